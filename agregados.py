@@ -0,0 +1,63 @@
+import pandas as pd
+import armazenamento
+import derivados
+import esquema
+
+# Dimensões da tabela de agregados diários (rollup)
+CHAVES_ROLLUP = ['Dia', 'USUÁRIO QUE CONCLUIU A TAREFA', 'SITUAÇÃO DA TAREFA', 'TAREFA']
+COLUNAS_ROLLUP = CHAVES_ROLLUP + ['Quantidade', 'Tempo_Total']
+
+def rollup_vazio():
+    return pd.DataFrame({
+        'Dia': pd.Series(dtype='datetime64[ns]'),
+        'USUÁRIO QUE CONCLUIU A TAREFA': pd.Series(dtype='category'),
+        'SITUAÇÃO DA TAREFA': pd.Series(dtype='category'),
+        'TAREFA': pd.Series(dtype='category'),
+        'Quantidade': pd.Series(dtype='int64'),
+        'Tempo_Total': pd.Series(dtype='float64'),
+    })
+
+# Função para agregar tarefas por (dia, analista, situação, tarefa), com contagem e tempo total em segundos
+def calcular_rollup(df):
+    if df.empty:
+        return rollup_vazio()
+    df = esquema.garantir_normalizado(df)
+    base = pd.DataFrame({
+        'Dia': df['DATA DE INÍCIO DA TAREFA'].dt.normalize(),
+        'USUÁRIO QUE CONCLUIU A TAREFA': df['USUÁRIO QUE CONCLUIU A TAREFA'],
+        'SITUAÇÃO DA TAREFA': df['SITUAÇÃO DA TAREFA'],
+        'TAREFA': df['TAREFA'] if 'TAREFA' in df.columns else None,
+        'Quantidade': 1,
+        'Tempo_Total': df['TEMPO MÉDIO OPERACIONAL'].astype('float64').fillna(0),
+    })
+    return _reagrupar(base)
+
+def _reagrupar(df):
+    # Agrupa pelos valores (e não pelas categorias) para manter os grupos nulos e não gerar combinações vazias
+    df = df.astype({c: object for c in esquema.COLUNAS_CATEGORICAS})
+    rollup = df.groupby(CHAVES_ROLLUP, dropna=False, sort=True).agg(
+        Quantidade=('Quantidade', 'sum'),
+        Tempo_Total=('Tempo_Total', 'sum')
+    ).reset_index()
+    rollup['Quantidade'] = rollup['Quantidade'].astype('int64')
+    return esquema.categorizar(rollup[COLUNAS_ROLLUP])
+
+# Função para juntar dois rollups parciais (ex.: lotes de uma mesma planilha)
+def combinar(rollup, outro):
+    if outro.empty:
+        return rollup
+    if rollup.empty:
+        return outro
+    return _reagrupar(pd.concat([rollup, outro], ignore_index=True))
+
+# Rollup gravado por usuário (ver derivados.py): somado a cada ingestão e reconstruído só quando defasado
+ROLLUP = derivados.TabelaDerivada(
+    nome='rollup',
+    colunas=armazenamento.COLUNAS_PADRAO[1:] + ['TAREFA'],
+    vazia=rollup_vazio,
+    calcular=lambda df: (calcular_rollup(df),),
+    iniciar=lambda usuario: (rollup_vazio(),),
+    acumular=lambda delta, df: (combinar(delta[0], calcular_rollup(df)),),
+    juntar=lambda atuais, delta: (combinar(atuais[0], delta[0]),),
+)
+
@@ -0,0 +1,144 @@
+import os
+import re
+import glob
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import datetime, timedelta
+
+# Armazenamento das anotações do Diário de Bordo em SQLite, com índice de texto completo (FTS5)
+FORMATO_BANCO = '%Y-%m-%d %H:%M:%S'
+FORMATO_TXT = '%d/%m/%Y %H:%M'
+
+# Linha do arquivo legado: "dd/mm/aaaa HH:MM - texto"
+_LINHA_TXT = re.compile(r'^(\d{2}/\d{2}/\d{4} \d{2}:\d{2}) - (.*)$')
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS anotacoes (
+    id INTEGER PRIMARY KEY,
+    data TEXT,
+    texto TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS anotacoes_data ON anotacoes (data);
+CREATE VIRTUAL TABLE IF NOT EXISTS anotacoes_fts USING fts5(
+    texto, content='anotacoes', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS anotacoes_inserir AFTER INSERT ON anotacoes BEGIN
+    INSERT INTO anotacoes_fts (rowid, texto) VALUES (new.id, new.texto);
+END;
+CREATE TRIGGER IF NOT EXISTS anotacoes_excluir AFTER DELETE ON anotacoes BEGIN
+    INSERT INTO anotacoes_fts (anotacoes_fts, rowid, texto) VALUES ('delete', old.id, old.texto);
+END;
+CREATE TRIGGER IF NOT EXISTS anotacoes_alterar AFTER UPDATE ON anotacoes BEGIN
+    INSERT INTO anotacoes_fts (anotacoes_fts, rowid, texto) VALUES ('delete', old.id, old.texto);
+    INSERT INTO anotacoes_fts (rowid, texto) VALUES (new.id, new.texto);
+END;
+CREATE TABLE IF NOT EXISTS migracoes (arquivo TEXT PRIMARY KEY, data TEXT NOT NULL);
+"""
+
+_trava = threading.Lock()
+_preparados = set()
+
+def caminho_banco(usuario):
+    return f'diario_bordo_{usuario}.db'
+
+# Arquivo de texto usado antes do banco (importado automaticamente no primeiro acesso)
+def caminho_txt(usuario):
+    return f'diario_bordo_{usuario}.txt'
+
+def _conectar(usuario):
+    novo = not os.path.exists(caminho_banco(usuario))
+    conexao = sqlite3.connect(caminho_banco(usuario), timeout=30)
+    with _trava:
+        if novo or usuario not in _preparados:
+            conexao.executescript(_ESQUEMA)
+            _migrar_txt(conexao, usuario)
+            _preparados.add(usuario)
+    return conexao
+
+# Converte as linhas do arquivo legado em anotações; linhas sem data continuam a anotação anterior
+def ler_txt(caminho):
+    anotacoes = []
+    with open(caminho, 'r', encoding='utf-8') as file:
+        for linha in file:
+            linha = linha.rstrip('\n')
+            encontrada = _LINHA_TXT.match(linha)
+            if encontrada:
+                data = datetime.strptime(encontrada.group(1), FORMATO_TXT).strftime(FORMATO_BANCO)
+                anotacoes.append([data, encontrada.group(2)])
+            elif anotacoes:
+                anotacoes[-1][1] += '\n' + linha
+            elif linha.strip():
+                anotacoes.append([None, linha])
+    return anotacoes
+
+def _migrar_txt(conexao, usuario):
+    caminho = caminho_txt(usuario)
+    if not os.path.exists(caminho):
+        return 0
+    if conexao.execute('SELECT 1 FROM migracoes WHERE arquivo = ?', (caminho,)).fetchone():
+        return 0
+    anotacoes = ler_txt(caminho)
+    with conexao:
+        conexao.executemany('INSERT INTO anotacoes (data, texto) VALUES (?, ?)', anotacoes)
+        conexao.execute('INSERT INTO migracoes (arquivo, data) VALUES (?, ?)', (caminho, datetime.now().strftime(FORMATO_BANCO)))
+    return len(anotacoes)
+
+# Função para migrar de uma vez os diários em texto de todos os usuários encontrados no diretório atual
+def migrar_todos():
+    migrados = {}
+    for arquivo in sorted(glob.glob('diario_bordo_*.txt')):
+        usuario = arquivo[len('diario_bordo_'):-len('.txt')]
+        with closing(sqlite3.connect(caminho_banco(usuario), timeout=30)) as conexao:
+            conexao.executescript(_ESQUEMA)
+            migrados[usuario] = _migrar_txt(conexao, usuario)
+    return migrados
+
+# Função para gravar uma nova anotação
+def adicionar(usuario, texto, data=None):
+    data = (data or datetime.now()).strftime(FORMATO_BANCO)
+    with closing(_conectar(usuario)) as conexao, conexao:
+        conexao.execute('INSERT INTO anotacoes (data, texto) VALUES (?, ?)', (data, texto))
+
+# Monta a consulta FTS5 a partir do texto digitado: cada palavra vira um termo entre aspas, com busca por prefixo
+def _consulta_fts(termos):
+    palavras = [p.replace('"', '""') for p in termos.split()]
+    return ' '.join(f'"{p}"*' for p in palavras)
+
+def _filtros(termos, data_inicial, data_final):
+    condicoes, parametros = [], []
+    if termos and termos.strip():
+        condicoes.append('id IN (SELECT rowid FROM anotacoes_fts WHERE anotacoes_fts MATCH ?)')
+        parametros.append(_consulta_fts(termos))
+    if data_inicial is not None:
+        condicoes.append('data >= ?')
+        parametros.append(datetime.combine(data_inicial, datetime.min.time()).strftime(FORMATO_BANCO))
+    if data_final is not None:
+        condicoes.append('data < ?')
+        parametros.append(datetime.combine(data_final + timedelta(days=1), datetime.min.time()).strftime(FORMATO_BANCO))
+    return (' WHERE ' + ' AND '.join(condicoes)) if condicoes else '', parametros
+
+# Função para buscar anotações por palavras-chave e/ou período, das mais recentes para as mais antigas
+def buscar(usuario, termos=None, data_inicial=None, data_final=None, limite=None, deslocamento=0):
+    where, parametros = _filtros(termos, data_inicial, data_final)
+    sql = f'SELECT data, texto FROM anotacoes{where} ORDER BY data DESC, id DESC'
+    if limite is not None:
+        sql += ' LIMIT ? OFFSET ?'
+        parametros += [limite, deslocamento]
+    with closing(_conectar(usuario)) as conexao:
+        linhas = conexao.execute(sql, parametros).fetchall()
+    return [(datetime.strptime(data, FORMATO_BANCO) if data else None, texto) for data, texto in linhas]
+
+# Função para contar as anotações que atendem aos filtros
+def contar(usuario, termos=None, data_inicial=None, data_final=None):
+    where, parametros = _filtros(termos, data_inicial, data_final)
+    with closing(_conectar(usuario)) as conexao:
+        return conexao.execute(f'SELECT COUNT(*) FROM anotacoes{where}', parametros).fetchone()[0]
+
+# Texto de uma anotação no formato do diário ("dd/mm/aaaa HH:MM - texto")
+def formatar(data, texto):
+    return f"{data.strftime(FORMATO_TXT)} - {texto}" if data else texto
+
+if __name__ == "__main__":
+    for usuario, quantidade in migrar_todos().items():
+        print(f"{usuario}: {quantidade} anotações migradas para {caminho_banco(usuario)}")
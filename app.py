@@ -1,6 +1,5 @@
 import streamlit as st
 from login import login
-from dashboard import dashboard
 
 st.set_page_config(
     page_title="Dashboard",  # Título da aba do navegador
@@ -21,5 +20,6 @@ if not st.session_state.logado:
     if login():
         st.rerun()  # Reinicia a aplicação para carregar a dashboard
 else:
-    # Se estiver logado, mostra a dashboard
+    # Se estiver logado, mostra a dashboard (importada só agora: a tela de login não carrega pandas nem Plotly)
+    from dashboard import dashboard
     dashboard()
@@ -0,0 +1,336 @@
+import os
+import glob
+import shutil
+import uuid
+import threading
+from contextlib import contextmanager, nullcontext
+from io import BytesIO
+import pandas as pd
+import esquema
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem travas de arquivo, apenas travas dentro do processo
+    fcntl = None
+
+# Colunas mínimas de um conjunto de dados de tarefas
+COLUNAS_PADRAO = esquema.COLUNAS_PADRAO
+
+# Backend usado como armazenamento principal (pode ser trocado pela variável de ambiente MAESTRO_BACKEND)
+BACKEND_PADRAO = os.environ.get('MAESTRO_BACKEND', 'parquet')
+
+# Quantidade de linhas lidas por lote na importação de planilhas grandes
+TAMANHO_LOTE = int(os.environ.get('MAESTRO_LOTE_LINHAS', '50000'))
+
+# Travas de cada usuário: ESCRITA ordena os gravadores (numeração e publicação dos segmentos, consolidação);
+# LEITURA é compartilhada pelos leitores e exclusiva apenas durante a troca do arquivo principal;
+# INGESTAO serializa ingestões e compactações inteiras (ver ingestao.py) e é sempre tomada antes das demais
+ESCRITA, LEITURA, INGESTAO = 'escrita', 'leitura', 'ingestao'
+
+_trava = threading.Lock()
+_travas_processo = {}
+
+# Funções de leitura/escrita do backend Parquet
+def _ler_parquet(caminho, colunas=None):
+    return pd.read_parquet(caminho, columns=colunas)
+
+def _escrever_parquet(df, caminho):
+    df.to_parquet(caminho, index=False)
+
+# pyarrow e openpyxl são importados apenas quando usados (a tela do diário não lê dados)
+def _colunas_parquet(caminho):
+    import pyarrow.parquet as pq
+    return pq.read_schema(caminho).names
+
+# Funções de leitura/escrita do backend Arrow IPC (Feather v2)
+def _ler_arrow(caminho, colunas=None):
+    return pd.read_feather(caminho, columns=colunas)
+
+def _escrever_arrow(df, caminho):
+    df.reset_index(drop=True).to_feather(caminho)
+
+def _colunas_arrow(caminho):
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    with pa.memory_map(caminho) as fonte:
+        return ipc.open_file(fonte).schema.names
+
+# Registro dos backends disponíveis: novos formatos só precisam ser adicionados aqui
+BACKENDS = {
+    'parquet': {'extensao': '.parquet', 'ler': _ler_parquet, 'escrever': _escrever_parquet, 'colunas': _colunas_parquet},
+    'arrow': {'extensao': '.arrow', 'ler': _ler_arrow, 'escrever': _escrever_arrow, 'colunas': _colunas_arrow},
+}
+
+def _backend(nome=None):
+    nome = nome or BACKEND_PADRAO
+    if nome not in BACKENDS:
+        raise ValueError(f"Backend de armazenamento desconhecido: {nome}")
+    return BACKENDS[nome]
+
+# Caminho do arquivo de dados do usuário no backend escolhido
+def caminho_dados(usuario, backend=None):
+    return f'dados_acumulados_{usuario}{_backend(backend)["extensao"]}'
+
+# Caminho da planilha legada do usuário
+def caminho_excel(usuario):
+    return f'dados_acumulados_{usuario}.xlsx'
+
+# Diretório com os lotes anexados (deltas) ainda não consolidados no arquivo principal
+def caminho_deltas(usuario):
+    return f'dados_acumulados_{usuario}_deltas'
+
+# Arquivo de trava de um usuário (vale também entre processos, via flock)
+def caminho_trava(usuario, nome):
+    return f'dados_acumulados_{usuario}.{nome}.lock'
+
+@contextmanager
+def _travar(usuario, nome, exclusiva=True):
+    if fcntl is None:
+        with _trava:
+            trava = _travas_processo.setdefault((usuario, nome), threading.Lock())
+        with trava:
+            yield
+        return
+    # Cada uso abre o seu próprio descritor, então a trava vale também entre threads do mesmo processo
+    with open(caminho_trava(usuario, nome), 'a') as file:
+        fcntl.flock(file, fcntl.LOCK_EX if exclusiva else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(file, fcntl.LOCK_UN)
+
+# Função para usar as travas do usuário fora deste módulo. As travas não são reentrantes:
+# quem já a detém não pode tomá-la de novo
+def travar(usuario, nome, exclusiva=True):
+    return _travar(usuario, nome, exclusiva)
+
+# Lista, em ordem de gravação, os arquivos que compõem os dados do usuário.
+# Cada delta é um arquivo ou uma pasta numerada (ingestão em lotes); pastas iniciadas por '.' ainda não foram publicadas
+def _arquivos_dados(usuario, backend=None):
+    b = _backend(backend)
+    arquivos = []
+    caminho = caminho_dados(usuario, backend)
+    if os.path.exists(caminho):
+        arquivos.append(caminho)
+    pasta = caminho_deltas(usuario)
+    if os.path.isdir(pasta):
+        for nome in sorted(os.listdir(pasta)):
+            item = os.path.join(pasta, nome)
+            if nome.startswith('.'):
+                continue
+            if os.path.isdir(item):
+                arquivos += sorted(os.path.join(item, a) for a in os.listdir(item) if a.endswith(b['extensao']))
+            elif nome.endswith(b['extensao']):
+                arquivos.append(item)
+    return arquivos
+
+# Próximo número livre para um arquivo ou pasta de lotes dentro de uma pasta de deltas
+def _proximo_numero(pasta):
+    numeros = [int(a.split('.')[0]) for a in os.listdir(pasta) if a.split('.')[0].isdigit()]
+    return max(numeros, default=0) + 1
+
+# Converte a planilha legada no primeiro acesso de um usuário ainda não migrado; devolve as linhas migradas
+# (None se não havia o que migrar). A verificação é refeita com a trava de escrita: a migração substitui o
+# arquivo principal e remove os deltas, então não pode acontecer depois que uma ingestão publicou dados
+def _migrar_se_necessario(usuario, backend=None):
+    if os.path.exists(caminho_dados(usuario, backend)) or not os.path.exists(caminho_excel(usuario)):
+        return None
+    with _travar(usuario, ESCRITA):
+        if _arquivos_dados(usuario, backend) or not os.path.exists(caminho_excel(usuario)):
+            return None
+        return _migrar(usuario, backend)
+
+# Versão dos dados do usuário: muda sempre que algum arquivo é gravado, anexado ou consolidado
+def versao(usuario, backend=None):
+    _migrar_se_necessario(usuario, backend)
+    with _travar(usuario, LEITURA, exclusiva=False):
+        return _versao(usuario, backend)
+
+def _versao(usuario, backend=None, arquivos=None):
+    principal = caminho_dados(usuario, backend)
+    partes = []
+    for arquivo in _arquivos_dados(usuario, backend) if arquivos is None else arquivos:
+        info = os.stat(arquivo)
+        # Deltas são identificados pelo caminho dentro da pasta de deltas (arquivo ou pasta/arquivo)
+        nome = os.path.basename(arquivo) if arquivo == principal else os.path.relpath(arquivo, caminho_deltas(usuario))
+        partes.append((nome, info.st_mtime_ns, info.st_size))
+    return tuple(partes)
+
+# Função para carregar os dados do usuário, lendo apenas as colunas pedidas
+def carregar(usuario, colunas=None, backend=None):
+    b = _backend(backend)
+    _migrar_se_necessario(usuario, backend)
+    with _travar(usuario, LEITURA, exclusiva=False):
+        arquivos = _arquivos_dados(usuario, backend)
+        if not arquivos:
+            return esquema.vazio(colunas)
+        return _ler_arquivos(b, arquivos, colunas)
+
+# Função para carregar os dados junto com a versão exata do que foi lido: a lista de arquivos e a versão
+# saem da mesma leitura do diretório, então segmentos publicados durante a leitura não entram em nenhuma das duas
+def carregar_versionado(usuario, colunas=None, backend=None):
+    b = _backend(backend)
+    _migrar_se_necessario(usuario, backend)
+    with _travar(usuario, LEITURA, exclusiva=False):
+        arquivos = _arquivos_dados(usuario, backend)
+        versao_lida = _versao(usuario, backend, arquivos)
+        if not arquivos:
+            return esquema.vazio(colunas), versao_lida
+        return _ler_arquivos(b, arquivos, colunas), versao_lida
+
+def _ler_arquivos(b, arquivos, colunas=None):
+    partes = []
+    for arquivo in arquivos:
+        colunas_arquivo = colunas
+        if colunas is not None:
+            # Colunas opcionais (ex.: 'TAREFA') podem não existir em planilhas antigas
+            disponiveis = b['colunas'](arquivo)
+            colunas_arquivo = [c for c in colunas if c in disponiveis]
+        # Partes gravadas com esquemas anteriores são normalizadas antes de serem unidas
+        parte = b['ler'](arquivo, colunas_arquivo)
+        partes.append(parte if esquema.normalizado(parte) else esquema.normalizar(parte, copiar=False))
+    return esquema.concatenar(partes)
+
+# Função para salvar o conjunto completo de dados do usuário (consolida os deltas)
+def salvar(df, usuario, backend=None):
+    b = _backend(backend)
+    with _travar(usuario, ESCRITA):
+        _substituir(usuario, b, esquema.garantir_normalizado(df), backend)
+
+# Grava o novo arquivo principal e, numa troca exclusiva para os leitores, substitui o anterior e
+# remove os deltas publicados (chamada com a trava de escrita)
+def _substituir(usuario, b, df, backend=None):
+    caminho = caminho_dados(usuario, backend)
+    temporario = caminho + '.tmp'
+    b['escrever'](df, temporario)
+    with _travar(usuario, LEITURA):
+        os.replace(temporario, caminho)
+        pasta = caminho_deltas(usuario)
+        if os.path.isdir(pasta):
+            # Lotes ainda em gravação (iniciados por '.') pertencem a ingestões em andamento
+            for nome in os.listdir(pasta):
+                if not nome.startswith('.'):
+                    item = os.path.join(pasta, nome)
+                    shutil.rmtree(item) if os.path.isdir(item) else os.remove(item)
+
+# Função para anexar apenas as linhas novas, sem reescrever o histórico: o custo é proporcional ao lote.
+# Com 'pendente', o lote é gravado numa pasta ainda não publicada (ver iniciar_lotes/publicar_lotes)
+def anexar(df, usuario, backend=None, pendente=None):
+    if df.empty:
+        return
+    b = _backend(backend)
+    pasta = pendente or caminho_deltas(usuario)
+    os.makedirs(pasta, exist_ok=True)
+    # O segmento é escrito fora da trava com um nome oculto; só a numeração e a renomeação são feitas sob a trava
+    temporario = os.path.join(pasta, f'.{uuid.uuid4().hex}.tmp')
+    b['escrever'](esquema.garantir_normalizado(df), temporario)
+    with nullcontext() if pendente else _travar(usuario, ESCRITA):
+        os.replace(temporario, os.path.join(pasta, f'{_proximo_numero(pasta):06d}{b["extensao"]}'))
+
+# Função para criar a pasta onde os lotes de uma ingestão ficam até serem publicados
+def iniciar_lotes(usuario):
+    pendente = os.path.join(caminho_deltas(usuario), f'.pendente-{uuid.uuid4().hex}')
+    os.makedirs(pendente)
+    return pendente
+
+# Função para publicar de uma vez todos os lotes de uma ingestão: uma única renomeação atômica da pasta,
+# de modo que os leitores continuam vendo a versão anterior até este ponto
+def publicar_lotes(usuario, pendente):
+    if not os.listdir(pendente):
+        os.rmdir(pendente)
+        return
+    pasta = caminho_deltas(usuario)
+    with _travar(usuario, ESCRITA):
+        os.replace(pendente, os.path.join(pasta, f'{_proximo_numero(pasta):06d}'))
+
+# Quantidade de segmentos (deltas) publicados e ainda não consolidados no arquivo principal
+def segmentos(usuario, backend=None):
+    with _travar(usuario, LEITURA, exclusiva=False):
+        return _segmentos(usuario, backend)
+
+def _segmentos(usuario, backend=None):
+    return sum(1 for a in _arquivos_dados(usuario, backend) if a != caminho_dados(usuario, backend))
+
+# Função para consolidar os deltas publicados no arquivo principal. Novas gravações aguardam a consolidação;
+# os leitores só são bloqueados durante a troca do arquivo principal.
+# Devolve (versão anterior, versão nova), ou None se não havia deltas
+def compactar(usuario, backend=None):
+    b = _backend(backend)
+    with _travar(usuario, ESCRITA):
+        with _travar(usuario, LEITURA, exclusiva=False):
+            if not _segmentos(usuario, backend):
+                return None
+            anterior = _versao(usuario, backend)
+            df = _ler_arquivos(b, _arquivos_dados(usuario, backend))
+        _substituir(usuario, b, df, backend)
+        return anterior, _versao(usuario, backend)
+
+def descartar_lotes(pendente):
+    shutil.rmtree(pendente, ignore_errors=True)
+
+# Converte a planilha legada (chamada com a trava de escrita)
+def _migrar(usuario, backend=None):
+    df = pd.read_excel(caminho_excel(usuario), engine='openpyxl')
+    _substituir(usuario, _backend(backend), esquema.normalizar(df), backend)
+    return len(df)
+
+# Função para converter a planilha legada de um usuário para o armazenamento colunar
+def migrar_excel(usuario, backend=None):
+    with _travar(usuario, ESCRITA):
+        return _migrar(usuario, backend)
+
+# Função para migrar de uma vez todas as planilhas legadas ainda não migradas no diretório atual
+def migrar_todos(backend=None):
+    migrados = {}
+    for arquivo in sorted(glob.glob('dados_acumulados_*.xlsx')):
+        usuario = arquivo[len('dados_acumulados_'):-len('.xlsx')]
+        linhas = _migrar_se_necessario(usuario, backend)
+        if linhas is not None:
+            migrados[usuario] = linhas
+    return migrados
+
+# Funções de importação/exportação em Excel (o Excel deixa de ser o armazenamento principal)
+# Função para ler uma planilha em lotes (modo somente leitura do openpyxl), sem carregá-la inteira na memória.
+# Gera (lote, linhas lidas até aqui, total estimado de linhas)
+def ler_excel_em_lotes(arquivo, tamanho_lote=None):
+    tamanho_lote = tamanho_lote or TAMANHO_LOTE
+    from openpyxl import load_workbook
+    planilha = load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        aba = planilha.worksheets[0]
+        linhas = aba.iter_rows(values_only=True)
+        cabecalho = next(linhas, None)
+        if cabecalho is None:
+            return
+        colunas = [str(c) if c is not None else f'Unnamed: {i}' for i, c in enumerate(cabecalho)]
+        total = max((aba.max_row or 1) - 1, 0)
+        lidas = 0
+        lote = []
+        for linha in linhas:
+            # Linhas totalmente vazias são ignoradas, como no pd.read_excel
+            if all(valor is None for valor in linha):
+                continue
+            lote.append(linha[:len(colunas)])
+            if len(lote) == tamanho_lote:
+                lidas += len(lote)
+                yield pd.DataFrame.from_records(lote, columns=colunas), lidas, max(total, lidas)
+                lote = []
+        if lote:
+            lidas += len(lote)
+            yield pd.DataFrame.from_records(lote, columns=colunas), lidas, max(total, lidas)
+    finally:
+        planilha.close()
+
+def exportar_excel(df):
+    buffer = BytesIO()
+    # Cópia rasa: só a coluna de tempo é substituída, os demais dados continuam compartilhados
+    df = df.copy(deep=False)
+    if esquema.COLUNA_TEMPO in df.columns:
+        df[esquema.COLUNA_TEMPO] = esquema.tempo_para_texto(df[esquema.COLUNA_TEMPO])
+    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+        df.to_excel(writer, index=False)
+    return buffer.getvalue()
+
+if __name__ == "__main__":
+    for usuario, linhas in migrar_todos().items():
+        print(f"{usuario}: {linhas} linhas migradas para {caminho_dados(usuario)}")
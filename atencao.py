@@ -0,0 +1,175 @@
+import os
+import warnings
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+import armazenamento
+import derivados
+import esquema
+
+# Pontos de atenção: tarefas cujo TMO fica muito acima da referência recente do mesmo tipo de tarefa,
+# seja a da equipe (mesma TAREFA) ou a do próprio analista (mesmo analista e TAREFA). A referência é a
+# mediana e o desvio absoluto mediano (MAD) das JANELA tarefas anteriores do grupo, em ordem de data.
+# Os pontos são calculados na ingestão e gravados; o painel só recorta a tabela pronta
+JANELA = int(os.environ.get('MAESTRO_ATENCAO_JANELA', '50'))
+MINIMO = 10  # tarefas anteriores necessárias para haver referência
+LIMIAR = 3.5  # desvios robustos acima da mediana para virar ponto de atenção
+ESCALA_MAD = 1.4826  # MAD -> desvio padrão em dados normais
+FOLGA = 0.1  # desvio mínimo, como fração da mediana (evita desvio zero em grupos de tempos iguais)
+
+# Linhas avaliadas por vez no cálculo das janelas (limita a memória a BLOCO x JANELA valores)
+BLOCO = 32768
+
+SITUACOES_TMO = ['Finalizada', 'Cancelada']
+COLUNAS_BASE = [esquema.COLUNA_PROTOCOLO, esquema.COLUNA_ANALISTA, esquema.COLUNA_TAREFA, esquema.COLUNA_DATA, esquema.COLUNA_TEMPO]
+COLUNAS_PONTOS = COLUNAS_BASE + ['Referencia_Equipe', 'Referencia_Analista', 'Motivo']
+
+def _base_vazia():
+    return pd.DataFrame({
+        esquema.COLUNA_PROTOCOLO: pd.Series(dtype=object),
+        esquema.COLUNA_ANALISTA: pd.Series(dtype='category'),
+        esquema.COLUNA_TAREFA: pd.Series(dtype='category'),
+        esquema.COLUNA_DATA: pd.Series(dtype='datetime64[ns]'),
+        esquema.COLUNA_TEMPO: pd.Series(dtype='float64'),
+    })
+
+def pontos_vazios():
+    return _base_vazia().assign(
+        Referencia_Equipe=pd.Series(dtype='float64'),
+        Referencia_Analista=pd.Series(dtype='float64'),
+        Motivo=pd.Series(dtype=object),
+    )
+
+# Tarefas avaliadas: finalizadas ou canceladas, com data e TMO preenchidos
+def _base(df):
+    if df.empty or esquema.COLUNA_SITUACAO not in df.columns:
+        return _base_vazia()
+    df = esquema.garantir_normalizado(df)
+    df = df[df[esquema.COLUNA_SITUACAO].isin(SITUACOES_TMO) & df[esquema.COLUNA_DATA].notna() & df[esquema.COLUNA_TEMPO].notna()]
+    return pd.DataFrame({
+        esquema.COLUNA_PROTOCOLO: df[esquema.COLUNA_PROTOCOLO] if esquema.COLUNA_PROTOCOLO in df.columns else None,
+        esquema.COLUNA_ANALISTA: df[esquema.COLUNA_ANALISTA],
+        esquema.COLUNA_TAREFA: df[esquema.COLUNA_TAREFA] if esquema.COLUNA_TAREFA in df.columns else None,
+        esquema.COLUNA_DATA: df[esquema.COLUNA_DATA],
+        esquema.COLUNA_TEMPO: df[esquema.COLUNA_TEMPO].astype('float64'),
+    }).reset_index(drop=True)
+
+# Mediana e MAD das JANELA linhas anteriores de cada linha, sem passar do início do seu grupo
+# (valores já ordenados por grupo e data); NaN onde a referência tem menos de MINIMO tarefas
+def _referencia(valores, inicio_grupo):
+    n = len(valores)
+    mediana = np.full(n, np.nan)
+    mad = np.full(n, np.nan)
+    # Com JANELA posições vazias na frente, a janela da linha i é preenchido[i:i + JANELA]
+    preenchido = np.concatenate([np.full(JANELA, np.nan), valores])
+    deslocamentos = np.arange(JANELA) - JANELA
+    for inicio in range(0, n, BLOCO):
+        fim = min(n, inicio + BLOCO)
+        linhas = np.arange(inicio, fim)
+        janelas = sliding_window_view(preenchido[inicio:fim + JANELA - 1], JANELA)
+        dentro = (linhas[:, None] + deslocamentos[None, :]) >= inicio_grupo[linhas, None]
+        janelas = np.where(dentro, janelas, np.nan)
+        suficientes = dentro.sum(axis=1) >= MINIMO
+        with warnings.catch_warnings():
+            # Linhas sem nenhuma tarefa anterior no grupo geram avisos de fatia vazia
+            warnings.simplefilter('ignore', RuntimeWarning)
+            centro = np.nanmedian(janelas, axis=1)
+            desvio = np.nanmedian(np.abs(janelas - centro[:, None]), axis=1)
+        mediana[inicio:fim] = np.where(suficientes, centro, np.nan)
+        mad[inicio:fim] = np.where(suficientes, desvio, np.nan)
+    return mediana, mad
+
+# Referência móvel de cada linha dentro do seu grupo (códigos), em ordem de data; também indica as
+# JANELA linhas mais recentes de cada grupo, que formam o estado para a próxima ingestão
+def _janelas_moveis(tempos, codigos, datas):
+    n = len(tempos)
+    posicoes = np.arange(n)
+    ordem = np.lexsort((posicoes, datas, codigos))
+    grupos = codigos[ordem]
+    mudou = grupos[1:] != grupos[:-1]
+    inicio_grupo = np.maximum.accumulate(np.where(np.r_[True, mudou], posicoes, 0))
+    fim_grupo = np.minimum.accumulate(np.where(np.r_[mudou, True], posicoes, n)[::-1])[::-1]
+    mediana, mad = _referencia(tempos[ordem], inicio_grupo)
+    resultado_mediana, resultado_mad, recente = np.empty(n), np.empty(n), np.empty(n, dtype=bool)
+    resultado_mediana[ordem] = mediana
+    resultado_mad[ordem] = mad
+    recente[ordem] = fim_grupo - posicoes < JANELA
+    return resultado_mediana, resultado_mad, recente
+
+def _grupos(base, colunas):
+    return base[colunas].astype(object).groupby(colunas, dropna=False, sort=False).ngroup().to_numpy()
+
+def _acima(tempos, mediana, mad):
+    limite = mediana + LIMIAR * np.maximum(ESCALA_MAD * mad, FOLGA * mediana)
+    return tempos > limite  # sem referência (NaN) nunca é ponto de atenção
+
+# Função para avaliar tarefas novas contra a referência recente. 'estado' traz as últimas tarefas de cada grupo
+# já avaliadas (ou None); devolve os pontos de atenção das tarefas novas e o estado atualizado
+def avaliar(df, estado=None):
+    novas = _base(df)
+    estado = _base_vazia() if estado is None else estado
+    if novas.empty:
+        return pontos_vazios(), estado
+    base = esquema.concatenar([estado, novas]) if not estado.empty else esquema.categorizar(novas)
+    nova = np.r_[np.zeros(len(estado), dtype=bool), np.ones(len(novas), dtype=bool)]
+    tempos = base[esquema.COLUNA_TEMPO].to_numpy(dtype=np.float64)
+    datas = base[esquema.COLUNA_DATA].to_numpy(dtype='datetime64[ns]').view(np.int64)
+
+    mediana_equipe, mad_equipe, recente_equipe = _janelas_moveis(tempos, _grupos(base, [esquema.COLUNA_TAREFA]), datas)
+    mediana_analista, mad_analista, recente_analista = _janelas_moveis(tempos, _grupos(base, [esquema.COLUNA_ANALISTA, esquema.COLUNA_TAREFA]), datas)
+    acima_equipe = _acima(tempos, mediana_equipe, mad_equipe)
+    acima_analista = _acima(tempos, mediana_analista, mad_analista)
+
+    marcadas = nova & (acima_equipe | acima_analista)
+    motivo = np.where(acima_equipe & acima_analista, 'Equipe e analista', np.where(acima_equipe, 'Equipe', 'Analista'))
+    pontos = base[marcadas].assign(
+        Referencia_Equipe=mediana_equipe[marcadas],
+        Referencia_Analista=mediana_analista[marcadas],
+        Motivo=motivo[marcadas],
+    ).reset_index(drop=True)
+    return pontos, base[recente_equipe | recente_analista].reset_index(drop=True)
+
+# Função para juntar os pontos de atenção de dois lotes
+def combinar(pontos, outro):
+    if outro.empty:
+        return pontos
+    if pontos.empty:
+        return outro
+    return esquema.concatenar([pontos, outro])
+
+# Estado gravado do usuário (None se ainda não houver), ponto de partida das janelas na próxima ingestão;
+# se ele não corresponder aos dados anteriores ao delta, a soma reavalia todo o histórico
+def carregar_estado(usuario):
+    caminho = PONTOS.caminho(usuario, 'estado')
+    return pd.read_parquet(caminho) if os.path.exists(caminho) else None
+
+# Indica se alguma tarefa nova é anterior à tarefa mais recente já avaliada do mesmo tipo (planilha retroativa):
+# as janelas das tarefas posteriores mudariam, então os pontos não podem ser apenas acrescentados
+def _retroativas(novas, estado):
+    if estado is None or estado.empty or novas.empty:
+        return False
+    ultima = estado.groupby(estado[esquema.COLUNA_TAREFA].astype(object), dropna=False)[esquema.COLUNA_DATA].max()
+    inicio = novas.groupby(novas[esquema.COLUNA_TAREFA].astype(object), dropna=False)[esquema.COLUNA_DATA].min()
+    return bool((inicio < ultima.reindex(inicio.index)).any())
+
+# Avalia um lote a partir do delta acumulado (pontos, estado) e devolve o delta com o lote,
+# ou None se o lote for retroativo (a ingestão então reavalia todo o histórico)
+def _acumular(delta, df):
+    if delta is None or _retroativas(_base(df), delta[1]):
+        return None
+    pontos, estado = avaliar(df, delta[1])
+    return combinar(delta[0], pontos), estado
+
+# Pontos gravados por usuário (ver derivados.py), junto com o estado das janelas (parte 'estado'):
+# cada lote é avaliado contra a referência que inclui os anteriores, e os pontos novos são acrescentados
+PONTOS = derivados.TabelaDerivada(
+    nome='atencao',
+    colunas=armazenamento.COLUNAS_PADRAO + [esquema.COLUNA_TAREFA],
+    vazia=pontos_vazios,
+    calcular=avaliar,
+    iniciar=lambda usuario: (pontos_vazios(), carregar_estado(usuario)),
+    acumular=_acumular,
+    juntar=lambda atuais, delta: (combinar(atuais[0], delta[0]), delta[1]),
+    coluna_data=esquema.COLUNA_DATA,
+    partes=(None, 'estado'),
+)
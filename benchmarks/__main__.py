@@ -0,0 +1,4 @@
+from benchmarks.executar import principal
+
+# Uso: python -m benchmarks --tamanhos 10000 100000 --saida resultados.json
+principal()
@@ -0,0 +1,145 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime, timedelta
+import pandas as pd
+import graficos
+import armazenamento
+import ingestao
+import cache_dados
+import esquema
+import agregados
+import indice
+import metricas
+import relatorios
+from relatorios import tmo_por_dia as calcular_tmo_por_dia, produtividade_diaria as calcular_produtividade_diaria
+from benchmarks import gerador
+
+TAMANHOS_PADRAO = [10_000, 100_000, 1_000_000, 5_000_000]
+
+# A ingestão lê planilhas .xlsx, limitadas a pouco mais de 1 milhão de linhas; acima disso o tempo de
+# gerar a planilha domina o teste, então por padrão a ingestão é medida com no máximo este número de linhas
+LINHAS_INGESTAO = 100_000
+
+USUARIO = 'benchmark'
+
+# Mede o tempo de uma etapa (melhor de N repetições) e guarda o resultado
+def _medir(resultados, tamanho, etapa, funcao, linhas=None, repeticoes=1):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        retorno = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    resultados.append({
+        'tamanho': tamanho,
+        'etapa': etapa,
+        'segundos': min(tempos),
+        'mediana': sorted(tempos)[len(tempos) // 2],
+        'repeticoes': repeticoes,
+        'linhas': linhas if linhas is not None else tamanho,
+    })
+    print(f'{tamanho:>9} {etapa:<28} {min(tempos):9.4f}s', file=sys.stderr)
+    return retorno
+
+# Mesmas figuras da Visão Geral da dashboard, incluindo a serialização enviada ao navegador
+def _figuras(indicadores):
+    figuras = [
+        graficos.produtividade_diaria(calcular_produtividade_diaria(indicadores)),
+        graficos.tmo_por_dia(calcular_tmo_por_dia(indicadores)),
+        graficos.status(indicadores.total_finalizadas, indicadores.total_canceladas),
+        graficos.tmo_por_analista(relatorios.tmo_por_analista(indicadores)),
+    ]
+    return [figura.to_json() for figura in figuras]
+
+# Executa todas as etapas para um tamanho de histórico
+def medir_tamanho(tamanho, repeticoes=3, linhas_ingestao=LINHAS_INGESTAO, semente=0):
+    resultados = []
+    bruto = _medir(resultados, tamanho, 'gerar', lambda: gerador.gerar(tamanho, semente))
+
+    # Ingestão de uma planilha (leitura em lotes, normalização, deduplicação, gravação e rollup)
+    linhas_planilha = min(tamanho, linhas_ingestao)
+    planilha = gerador.gerar_excel(linhas_planilha, semente)
+    _medir(resultados, tamanho, 'ingestao', lambda: ingestao.ingerir(USUARIO + '_ingestao', 'benchmark.xlsx', planilha), linhas=linhas_planilha)
+
+    df = _medir(resultados, tamanho, 'normalizar', lambda: esquema.normalizar(bruto), repeticoes=repeticoes)
+    _medir(resultados, tamanho, 'salvar', lambda: armazenamento.salvar(df, USUARIO))
+    _medir(resultados, tamanho, 'carregar', lambda: armazenamento.carregar(USUARIO), repeticoes=repeticoes)
+    _medir(resultados, tamanho, 'carregar_colunas', lambda: armazenamento.carregar(USUARIO, [esquema.COLUNA_PROTOCOLO]), repeticoes=repeticoes)
+    cache_dados.invalidar(USUARIO)
+    _medir(resultados, tamanho, 'cache_falta', lambda: cache_dados.obter(USUARIO))
+    _medir(resultados, tamanho, 'cache_acerto', lambda: cache_dados.obter(USUARIO), repeticoes=repeticoes)
+
+    rollup = _medir(resultados, tamanho, 'rollup', lambda: indice.ordenar(agregados.calcular_rollup(df), 'Dia'), repeticoes=repeticoes)
+    idx = _medir(resultados, tamanho, 'indice', lambda: indice.construir(rollup, 'Dia', esquema.COLUNA_ANALISTA), linhas=len(rollup), repeticoes=repeticoes)
+
+    # Filtros: último mês do período e um analista nesse mês
+    data_final = rollup['Dia'].max().date()
+    data_inicial = data_final - timedelta(days=30)
+    analista = rollup[esquema.COLUNA_ANALISTA].iloc[0]
+    fatia = _medir(resultados, tamanho, 'filtro_periodo', lambda: indice.fatiar(rollup, idx, data_inicial, data_final), linhas=len(rollup), repeticoes=repeticoes)
+    _medir(resultados, tamanho, 'filtro_analista', lambda: indice.fatiar(rollup, idx, data_inicial, data_final, analista), linhas=len(rollup), repeticoes=repeticoes)
+
+    indicadores = _medir(resultados, tamanho, 'metricas_total', lambda: metricas.calcular(rollup), linhas=len(rollup), repeticoes=repeticoes)
+    _medir(resultados, tamanho, 'metricas_periodo', lambda: metricas.calcular(fatia), linhas=len(fatia), repeticoes=repeticoes)
+    _medir(resultados, tamanho, 'calcular_tmo_por_dia', lambda: calcular_tmo_por_dia(indicadores), linhas=len(indicadores.por_dia), repeticoes=repeticoes)
+    _medir(resultados, tamanho, 'calcular_produtividade_diaria', lambda: calcular_produtividade_diaria(indicadores), linhas=len(indicadores.por_dia), repeticoes=repeticoes)
+    _medir(resultados, tamanho, 'figuras', lambda: _figuras(indicadores), linhas=len(indicadores.por_dia), repeticoes=repeticoes)
+    return resultados
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# Executa a suíte completa num diretório temporário (os módulos gravam no diretório atual)
+def executar(tamanhos=None, repeticoes=3, linhas_ingestao=LINHAS_INGESTAO):
+    resultados = []
+    diretorio_original = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix='maestro_benchmark_') as diretorio:
+        os.chdir(diretorio)
+        try:
+            for tamanho in tamanhos or TAMANHOS_PADRAO:
+                resultados += medir_tamanho(tamanho, repeticoes, linhas_ingestao)
+                cache_dados.invalidar(USUARIO)
+                # Cada tamanho começa com o diretório vazio (sem histórico nem registro de ingestões)
+                for arquivo in os.listdir(diretorio):
+                    caminho = os.path.join(diretorio, arquivo)
+                    shutil.rmtree(caminho) if os.path.isdir(caminho) else os.remove(caminho)
+        finally:
+            os.chdir(diretorio_original)
+    return {
+        'commit': _commit(),
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'maquina': platform.machine(),
+        'cpus': os.cpu_count(),
+        'resultados': resultados,
+    }
+
+def principal(argumentos=None):
+    parser = argparse.ArgumentParser(description='Mede ingestão, carga, filtros e agregações com históricos sintéticos.')
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=TAMANHOS_PADRAO, help='quantidades de linhas do histórico')
+    parser.add_argument('--repeticoes', type=int, default=3, help='repetições das etapas rápidas (vale a melhor)')
+    parser.add_argument('--linhas-ingestao', type=int, default=LINHAS_INGESTAO, help='máximo de linhas da planilha de ingestão')
+    parser.add_argument('--saida', help='arquivo JSON de resultados (padrão: saída padrão)')
+    args = parser.parse_args(argumentos)
+
+    relatorio = executar(args.tamanhos, args.repeticoes, args.linhas_ingestao)
+    texto = json.dumps(relatorio, ensure_ascii=False, indent=2)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as file:
+            file.write(texto)
+    else:
+        print(texto)
+
+if __name__ == "__main__":
+    principal()
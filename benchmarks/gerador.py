@@ -0,0 +1,72 @@
+from io import BytesIO
+import numpy as np
+import pandas as pd
+import esquema
+
+# Nomes usados para montar os analistas sintéticos (nome.sobrenome, como no sistema de tarefas)
+NOMES = ['ana', 'bruno', 'carla', 'diego', 'elisa', 'fabio', 'gabriela', 'heitor', 'isabela', 'joao',
+         'larissa', 'marcos', 'natalia', 'otavio', 'paula', 'rafael', 'sabrina', 'tiago', 'vanessa', 'wagner']
+SOBRENOMES = ['silva', 'santos', 'oliveira', 'souza', 'lima', 'pereira', 'costa', 'almeida']
+
+# Tipos de tarefa e o TMO típico (em segundos) de cada um
+TAREFAS = {
+    'Cadastro de Processo': 420,
+    'Análise Documental': 780,
+    'Conferência de Dados': 300,
+    'Revisão de Cálculo': 960,
+    'Protocolo de Petição': 240,
+    'Atualização Cadastral': 180,
+    'Triagem de Intimação': 150,
+    'Baixa de Pendência': 360,
+}
+
+# Situações e suas proporções (as demais situações não entram nos indicadores, mas existem no histórico)
+SITUACOES = {'Finalizada': 0.8, 'Cancelada': 0.15, 'Em Andamento': 0.03, 'Pendente': 0.02}
+
+def analistas(quantidade):
+    return [f'{NOMES[i % len(NOMES)]}.{SOBRENOMES[i // len(NOMES) % len(SOBRENOMES)]}' for i in range(quantidade)]
+
+# Texto "HH:MM:SS", formato em que o TMO chega do Excel
+def _tempo_em_texto(segundos):
+    horas, resto = np.divmod(segundos, 3600)
+    minutos, segundos = np.divmod(resto, 60)
+    partes = [pd.Series(v).astype(str).str.zfill(2) for v in (horas, minutos, segundos)]
+    return (partes[0] + ':' + partes[1] + ':' + partes[2]).to_numpy(dtype=object)
+
+# Função para gerar um histórico sintético de tarefas com as colunas e formatos da planilha exportada.
+# 'bruto' devolve os textos como vêm do Excel; caso contrário, o conjunto já sai normalizado
+def gerar(linhas, semente=0, inicio='2024-01-01', dias=365, n_analistas=25, protocolo_inicial=1, bruto=True):
+    rng = np.random.default_rng(semente)
+    nomes_analistas = np.array(analistas(n_analistas), dtype=object)
+    nomes_tarefas = np.array(list(TAREFAS), dtype=object)
+    nomes_situacoes = np.array(list(SITUACOES), dtype=object)
+
+    tarefa = rng.integers(0, len(nomes_tarefas), linhas)
+    # Analistas com volumes diferentes (alguns concentram mais tarefas que outros)
+    pesos = rng.gamma(2.0, 1.0, n_analistas)
+    analista = rng.choice(n_analistas, linhas, p=pesos / pesos.sum())
+    situacao = rng.choice(len(nomes_situacoes), linhas, p=list(SITUACOES.values()))
+    tmo_base = np.array(list(TAREFAS.values()), dtype=np.float64)[tarefa]
+    tempo = np.clip(rng.lognormal(np.log(tmo_base), 0.5), 10, 4 * 3600).astype(np.int64)
+    # Início em horário comercial, em qualquer dia do período
+    inicio_tarefa = (
+        np.datetime64(pd.Timestamp(inicio))
+        + rng.integers(0, dias, linhas).astype('timedelta64[D]')
+        + (8 * 3600 + rng.integers(0, 10 * 3600, linhas)).astype('timedelta64[s]')
+    )
+
+    df = pd.DataFrame({
+        esquema.COLUNA_PROTOCOLO: np.arange(protocolo_inicial, protocolo_inicial + linhas),
+        esquema.COLUNA_ANALISTA: nomes_analistas[analista],
+        esquema.COLUNA_SITUACAO: nomes_situacoes[situacao],
+        esquema.COLUNA_TEMPO: _tempo_em_texto(tempo),
+        esquema.COLUNA_DATA: pd.Series(inicio_tarefa).dt.strftime(esquema.FORMATO_DATA).to_numpy(dtype=object),
+        esquema.COLUNA_TAREFA: nomes_tarefas[tarefa],
+    })
+    return df if bruto else esquema.normalizar(df)
+
+# Função para gerar a planilha (.xlsx) de um histórico sintético, usada nos testes de ingestão
+def gerar_excel(linhas, semente=0, **opcoes):
+    buffer = BytesIO()
+    gerar(linhas, semente, **opcoes).to_excel(buffer, index=False, engine='openpyxl')
+    return buffer.getvalue()
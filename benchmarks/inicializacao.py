@@ -0,0 +1,124 @@
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+# Partida a frio de cada tela: tempo para importar os módulos que ela carrega, medido num processo novo
+# e descontando o próprio Streamlit (carregado antes da medição, pois toda tela depende dele).
+# A tela de login é o próprio app.py executado como script (AppTest) para um usuário não logado
+TELAS = {
+    'login': ['app'],
+    'diario': ['dashboard', 'diario'],
+    'visao_geral': ['dashboard', 'graficos'],
+}
+
+# Módulos que uma tela não pode carregar além dos que o próprio Streamlit já carrega (ver _BASE).
+# O pyarrow não entra na lista do diário porque o próprio pandas o importa quando está instalado
+PROIBIDOS = {
+    'login': ['dashboard', 'pandas', 'plotly.express', 'pyarrow', 'openpyxl'],
+    'diario': ['graficos', 'plotly.express', 'openpyxl'],
+    'visao_geral': ['openpyxl'],
+}
+
+# Módulos que são scripts do Streamlit (executados numa sessão de teste, e não apenas importados)
+SCRIPTS = ['app']
+
+# Módulos fornecidos na implantação, fora do repositório, trocados por um substituto vazio na medição
+# (suas funções devolvem False: o formulário de login não autentica ninguém)
+SUBSTITUTOS = {
+    'login': ['login'],
+}
+
+# Orçamento de importação de cada tela, em segundos
+ORCAMENTO = {'login': 0.2, 'diario': 1.5, 'visao_geral': 3.0}
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_MEDIR = """
+import sys, json, time, types, importlib
+import streamlit
+from streamlit.testing.v1 import AppTest
+for nome in {substitutos!r}:
+    substituto = types.ModuleType(nome)
+    substituto.__getattr__ = lambda atributo: (lambda *args, **kwargs: False)
+    sys.modules[nome] = substituto
+antes = set(sys.modules)
+inicio = time.perf_counter()
+try:
+    erro = ausente = None
+    for modulo in {modulos!r}:
+        if modulo in {scripts!r}:
+            sessao = AppTest.from_file(modulo + '.py').run()
+            erro = erro or next((e.message for e in sessao.exception), None)
+        else:
+            importlib.import_module(modulo)
+except ImportError as e:
+    # Módulo da própria tela não encontrado: a tela não pôde ser medida
+    ausente = e.name if isinstance(e, ModuleNotFoundError) and e.name in {modulos!r} else None
+    erro = None if ausente else str(e)
+except Exception as e:
+    erro = f'{{type(e).__name__}}: {{e}}'
+segundos = time.perf_counter() - inicio
+novos = set(sys.modules) - antes
+print(json.dumps({{'segundos': segundos, 'modulos': len(novos), 'carregados': sorted(sys.modules), 'erro': erro, 'ausente': ausente}}))
+"""
+
+# Linha de base: módulos carregados por um processo novo que só executa um script vazio no Streamlit.
+# Os proibidos são comparados com ela, e não com os módulos presentes antes da medição: o Streamlit
+# carrega parte das suas dependências (ex.: pandas, em algumas versões) só ao executar o script
+_BASE = """
+import sys, json
+from streamlit.testing.v1 import AppTest
+AppTest.from_string('import streamlit as st').run()
+print(json.dumps(sorted(sys.modules)))
+"""
+_base = None
+
+def modulos_streamlit():
+    global _base
+    if _base is None:
+        saida = subprocess.run([sys.executable, '-c', _BASE], cwd=RAIZ, capture_output=True, text=True, check=True).stdout
+        _base = set(json.loads(saida.strip().splitlines()[-1]))
+    return _base
+
+# Mede uma tela (melhor de N processos novos)
+def medir_tela(tela, repeticoes=3):
+    codigo = _MEDIR.format(modulos=TELAS[tela], substitutos=SUBSTITUTOS.get(tela, []), scripts=SCRIPTS)
+    medidas = []
+    for _ in range(repeticoes):
+        saida = subprocess.run([sys.executable, '-c', codigo], cwd=RAIZ, capture_output=True, text=True, check=True).stdout
+        medidas.append(json.loads(saida.strip().splitlines()[-1]))
+    melhor = min(medidas, key=lambda m: m['segundos'])
+    carregados = set(melhor.pop('carregados'))
+    proibidos = [m for m in PROIBIDOS.get(tela, []) if m in carregados and m not in modulos_streamlit()]
+    return dict(melhor, proibidos=proibidos, tela=tela, orcamento=ORCAMENTO.get(tela))
+
+# Uma tela passa se foi medida, importou tudo, dentro do orçamento e sem carregar módulos proibidos
+def aprovada(medida):
+    return (medida['ausente'] is None and medida['erro'] is None and not medida['proibidos']
+            and (medida['orcamento'] is None or medida['segundos'] <= medida['orcamento']))
+
+def _orcamento(texto):
+    tela, segundos = texto.split('=')
+    return tela, float(segundos)
+
+def principal(argumentos=None):
+    parser = argparse.ArgumentParser(description='Mede o tempo de importação de cada tela e verifica o orçamento de partida.')
+    parser.add_argument('--telas', nargs='+', choices=list(TELAS), default=list(TELAS), help='telas medidas')
+    parser.add_argument('--repeticoes', type=int, default=3, help='processos por tela (vale o melhor)')
+    parser.add_argument('--orcamento', type=_orcamento, action='append', default=[], metavar='TELA=SEGUNDOS', help='troca o orçamento de uma tela')
+    args = parser.parse_args(argumentos)
+    ORCAMENTO.update(dict(args.orcamento))
+
+    medidas = [medir_tela(tela, args.repeticoes) for tela in args.telas]
+    for medida in medidas:
+        situacao = f"FALHOU: não medida ({medida['ausente']} ausente)" if medida['ausente'] else 'ok' if aprovada(medida) else 'FALHOU'
+        detalhe = medida['erro'] or (f"proibidos: {', '.join(medida['proibidos'])}" if medida['proibidos'] else '')
+        print(f"{medida['tela']:<12} {medida['segundos']:8.3f}s (orçamento {medida['orcamento']}s) {medida['modulos']:5} módulos {situacao} {detalhe}", file=sys.stderr)
+    print(json.dumps(medidas, ensure_ascii=False, indent=2))
+    return 0 if all(aprovada(m) for m in medidas) else 1
+
+# Uso: python -m benchmarks.inicializacao [--telas login diario] [--orcamento diario=1.0]
+if __name__ == "__main__":
+    sys.exit(principal())
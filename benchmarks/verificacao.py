@@ -0,0 +1,73 @@
+import sys
+import json
+import argparse
+import numpy as np
+import pandas as pd
+import agregados
+import esbocos
+import esquema
+import metricas
+from benchmarks import gerador
+
+# Quantidades de analistas verificadas: os códigos das categóricas são int8 até 127 categorias e int16 acima
+# disso, e os índices combinados (analista x situação, analista x balde) transbordavam nas duas faixas
+ANALISTAS_PADRAO = [25, 100, 150]
+
+# Indicadores por analista calculados diretamente das tarefas, com pandas, para comparação
+def _referencia_por_analista(df):
+    situacao = df[esquema.COLUNA_SITUACAO].astype(object)
+    base = pd.DataFrame({
+        'analista': df[esquema.COLUNA_ANALISTA].astype(object),
+        'Finalizado': (situacao == 'Finalizada').astype(np.int64),
+        'Cancelado': (situacao == 'Cancelada').astype(np.int64),
+        'Tempo_Total': df[esquema.COLUNA_TEMPO].astype('float64').fillna(0).where(situacao.isin(['Finalizada', 'Cancelada']), 0),
+    })
+    return base.groupby('analista').sum()
+
+# Compara o motor de métricas com a referência para um histórico sintético com 'n_analistas' analistas
+def verificar_metricas(n_analistas, linhas=20_000, semente=0):
+    df = gerador.gerar(linhas, semente, n_analistas=n_analistas, bruto=False)
+    try:
+        indicadores = metricas.calcular(agregados.calcular_rollup(df))
+    except Exception as e:
+        return {'verificacao': 'metricas', 'analistas': n_analistas, 'ok': False, 'erro': f'{type(e).__name__}: {e}'}
+    calculado = indicadores.por_analista.set_index('USUÁRIO QUE CONCLUIU A TAREFA')[['Finalizado', 'Cancelado', 'Tempo_Total']]
+    referencia = _referencia_por_analista(df)
+    referencia = referencia[(referencia['Finalizado'] + referencia['Cancelado']) > 0]
+    ok = (sorted(calculado.index) == sorted(referencia.index)
+          and np.array_equal(calculado.loc[referencia.index, ['Finalizado', 'Cancelado']].to_numpy(), referencia[['Finalizado', 'Cancelado']].to_numpy())
+          and np.allclose(calculado.loc[referencia.index, 'Tempo_Total'].to_numpy(), referencia['Tempo_Total'].to_numpy()))
+    return {'verificacao': 'metricas', 'analistas': n_analistas, 'ok': bool(ok), 'erro': None if ok else 'indicadores por analista divergem da referência'}
+
+# Compara os percentis por analista dos esboços com os percentis exatos (erro relativo até esbocos.PRECISAO)
+def verificar_esbocos(n_analistas, linhas=20_000, semente=0):
+    df = gerador.gerar(linhas, semente, n_analistas=n_analistas, bruto=False)
+    try:
+        calculado = esbocos.percentis_por_analista(esbocos.calcular_esboco(df)).set_index(esquema.COLUNA_ANALISTA)
+    except Exception as e:
+        return {'verificacao': 'esbocos', 'analistas': n_analistas, 'ok': False, 'erro': f'{type(e).__name__}: {e}'}
+    tmo = df[df[esquema.COLUNA_SITUACAO].isin(esbocos.SITUACOES_TMO)]
+    tempos = tmo[esquema.COLUNA_TEMPO].astype('float64').fillna(0).groupby(tmo[esquema.COLUNA_ANALISTA].astype(object))
+    ok = sorted(calculado.index) == sorted(tempos.groups)
+    for quantil in esbocos.PERCENTIS if ok else []:
+        # O esboço devolve o balde do elemento de posto quantil * (n - 1), como o método 'lower'
+        exato = tempos.quantile(quantil, interpolation='lower')
+        estimado = calculado.loc[exato.index, f'p{quantil * 100:g}']
+        ok = ok and bool((np.abs(estimado - exato) <= esbocos.PRECISAO * exato + 1e-9).all())
+    return {'verificacao': 'esbocos', 'analistas': n_analistas, 'ok': bool(ok), 'erro': None if ok else 'percentis por analista fora da precisão'}
+
+def principal(argumentos=None):
+    parser = argparse.ArgumentParser(description='Verifica os cálculos vetorizados (métricas e esboços de TMO) contra uma referência em pandas.')
+    parser.add_argument('--analistas', type=int, nargs='+', default=ANALISTAS_PADRAO, help='quantidades de analistas verificadas')
+    parser.add_argument('--linhas', type=int, default=20_000, help='linhas do histórico sintético')
+    args = parser.parse_args(argumentos)
+
+    resultados = [verificar(n, args.linhas) for verificar in (verificar_metricas, verificar_esbocos) for n in args.analistas]
+    for resultado in resultados:
+        print(f"{resultado['verificacao']:<12} {resultado['analistas']:5} analistas {'ok' if resultado['ok'] else 'FALHOU'} {resultado['erro'] or ''}", file=sys.stderr)
+    print(json.dumps(resultados, ensure_ascii=False, indent=2))
+    return 0 if all(r['ok'] for r in resultados) else 1
+
+# Uso: python -m benchmarks.verificacao [--analistas 25 100 150]
+if __name__ == "__main__":
+    sys.exit(principal())
@@ -0,0 +1,175 @@
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import armazenamento
+import esquema
+import indice
+
+# Versão do esquema dos dados tipados; incrementar quando a preparação dos dados mudar
+ESQUEMA = 2
+
+# Limites do cache compartilhado por todas as sessões do processo
+LIMITE_MEMORIA = int(os.environ.get('MAESTRO_CACHE_MB', '1024')) * 1024 * 1024
+LIMITE_ENTRADAS = int(os.environ.get('MAESTRO_CACHE_ENTRADAS', '64'))
+LIMITE_FIGURAS = int(os.environ.get('MAESTRO_CACHE_FIGURAS', '256'))
+
+# Chave de usuário das entradas da visão consolidada (não é um nome de login válido)
+CONSOLIDADO = '*consolidado*'
+
+_entradas = OrderedDict()  # chave -> (valor, bytes ocupados)
+_trava = threading.Lock()
+_travas_carga = {}
+_estatisticas = {'acertos': 0, 'faltas': 0, 'remocoes': 0, 'figuras_acertos': 0, 'figuras_faltas': 0}
+
+# Figuras já montadas, separadas dos conjuntos de dados para não disputarem o mesmo limite
+_figuras = OrderedDict()  # (usuário, versão dos dados, nome, data inicial, data final, analista) -> figura
+
+def _memoria_total():
+    return sum(tamanho for _, tamanho in _entradas.values())
+
+# Remove as entradas menos usadas até respeitar os limites de memória e de quantidade
+def _aplicar_limites():
+    while _entradas and (len(_entradas) > LIMITE_ENTRADAS or _memoria_total() > LIMITE_MEMORIA):
+        _entradas.popitem(last=False)
+        _estatisticas['remocoes'] += 1
+
+# Memória ocupada por um valor do cache (conjuntos de dados ou índices)
+def _tamanho(valor):
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(index=True, deep=True).sum())
+    if isinstance(valor, indice.IndiceTemporal):
+        return int(valor.tempos.nbytes + sum(p.nbytes for p in valor.posicoes_analista.values()))
+    return 0
+
+# Arrays NumPy por trás de um DataFrame (colunas NumPy, datas, categorias e inteiros com nulos).
+# Usa o BlockManager do pandas 1.5 (versão fixada em requirements.txt): as rotas públicas (Series.to_numpy,
+# Series.array, cat.codes) devolvem visões ou cópias, e marcá-las como somente leitura não impede a escrita
+# nos blocos consolidados que o DataFrame de fato usa. Ao trocar de versão do pandas, revalidar que
+# df.iloc[0, 0] = ... falha num valor do cache
+def _arrays(df):
+    for valores in df._mgr.arrays:
+        if isinstance(valores, np.ndarray):
+            yield valores
+        for atributo in ('_ndarray', '_data', '_mask'):
+            if isinstance(getattr(valores, atributo, None), np.ndarray):
+                yield getattr(valores, atributo)
+
+# Valores do cache são compartilhados por todas as sessões sem cópia dos dados: ficam somente leitura,
+# de modo que qualquer escrita no lugar falha em vez de alterar o que as demais sessões veem
+def _congelar(valor):
+    if isinstance(valor, pd.DataFrame):
+        arrays = list(_arrays(valor))
+    elif isinstance(valor, indice.IndiceTemporal):
+        arrays = [valor.tempos, *valor.posicoes_analista.values()]
+    else:
+        arrays = []
+    for array in arrays:
+        array.flags.writeable = False
+    return valor
+
+# Conjuntos de dados são devolvidos como cópia rasa (os mesmos arrays, somente leitura): cada sessão
+# pode trocar ou acrescentar colunas na sua cópia sem afetar o cache das demais
+def _entregar(valor):
+    return valor.copy(deep=False) if isinstance(valor, pd.DataFrame) else valor
+
+def _trava_carga(chave):
+    with _trava:
+        return _travas_carga.setdefault(chave, threading.Lock())
+
+def _buscar(chave):
+    with _trava:
+        if chave in _entradas:
+            _entradas.move_to_end(chave)
+            _estatisticas['acertos'] += 1
+            return _entregar(_entradas[chave][0])
+    return None
+
+# Busca uma entrada do cache; chaves têm a forma (usuário, versão dos dados, conteúdo, esquema)
+def _obter(chave, carregar):
+    valor = _buscar(chave)
+    if valor is not None:
+        return valor
+
+    # Uma única sessão carrega cada versão; as demais aguardam e reaproveitam o resultado
+    with _trava_carga(chave):
+        valor = _buscar(chave)
+        if valor is not None:
+            return valor
+        valor = _congelar(carregar())
+        tamanho = _tamanho(valor)
+        with _trava:
+            _estatisticas['faltas'] += 1
+            # Versões anteriores do mesmo usuário/conteúdo não serão mais pedidas
+            for antiga in [c for c in _entradas if c[0] == chave[0] and c[2] == chave[2]]:
+                del _entradas[antiga]
+            _entradas[chave] = (valor, tamanho)
+            _aplicar_limites()
+            _travas_carga.pop(chave, None)
+    return _entregar(valor)
+
+# Função para carregar os dados do usuário já ordenados pela data de início
+def _carregar_ordenado(usuario, colunas):
+    df = armazenamento.carregar(usuario, colunas)
+    if esquema.COLUNA_DATA in df.columns:
+        df = indice.ordenar(df, esquema.COLUNA_DATA)
+    return df
+
+# Função para obter uma figura montada, reconstruindo-a apenas quando a versão dos dados, o período ou o analista mudam.
+# A figura é compartilhada entre as sessões e não deve ser alterada depois de montada
+def obter_figura(chave, construir):
+    with _trava:
+        if chave in _figuras:
+            _figuras.move_to_end(chave)
+            _estatisticas['figuras_acertos'] += 1
+            return _figuras[chave]
+    figura = construir()
+    with _trava:
+        _estatisticas['figuras_faltas'] += 1
+        # Figuras de versões anteriores dos dados do usuário não serão mais pedidas
+        for antiga in [c for c in _figuras if c[0] == chave[0] and c[1] != chave[1]]:
+            del _figuras[antiga]
+        _figuras[chave] = figura
+        while len(_figuras) > LIMITE_FIGURAS:
+            _figuras.popitem(last=False)
+    return figura
+
+# Função para obter os dados tipados do usuário, lendo do armazenamento apenas quando a versão muda
+def obter(usuario, colunas=None):
+    chave = (usuario, armazenamento.versao(usuario), tuple(colunas) if colunas is not None else None, ESQUEMA)
+    return _obter(chave, lambda: _carregar_ordenado(usuario, colunas))
+
+# Função para obter uma tabela derivada do usuário (ver derivados.py: rollup, esboços, pontos de atenção),
+# ordenada pela sua coluna de data
+def obter_tabela(tabela, usuario, versao=None):
+    versao = versao or armazenamento.versao(usuario)
+    return _obter((usuario, versao, tabela.nome, ESQUEMA),
+                  lambda: indice.ordenar(tabela.carregar(usuario, versao)[0], tabela.coluna_data))
+
+def _indexar(tabela, df, chave):
+    return _obter(chave, lambda: indice.construir(df, tabela.coluna_data, esquema.COLUNA_ANALISTA))
+
+# Função para obter a tabela derivada junto com seu índice temporal (construído uma vez por versão)
+def obter_indexado(tabela, usuario, versao=None):
+    versao = versao or armazenamento.versao(usuario)
+    df = obter_tabela(tabela, usuario, versao)
+    return df, _indexar(tabela, df, (usuario, versao, 'indice_' + tabela.nome, ESQUEMA))
+
+# Função para obter a tabela derivada consolidada de vários usuários junto com seu índice. A chave é a versão
+# de cada conjunto de dados ((usuário, versão), ...), e 'consolidar' só é chamada quando alguma delas muda
+def obter_consolidado(tabela, versoes, consolidar):
+    df = _obter((CONSOLIDADO, versoes, tabela.nome, ESQUEMA), consolidar)
+    return df, _indexar(tabela, df, (CONSOLIDADO, versoes, 'indice_' + tabela.nome, ESQUEMA))
+
+# Função para descartar os dados em cache de um usuário (chamada após gravações)
+def invalidar(usuario):
+    with _trava:
+        for chave in [c for c in _entradas if c[0] == usuario]:
+            del _entradas[chave]
+        for chave in [c for c in _figuras if c[0] == usuario]:
+            del _figuras[chave]
+
+def estatisticas():
+    with _trava:
+        return dict(_estatisticas, entradas=len(_entradas), memoria=_memoria_total(), figuras=len(_figuras))
@@ -0,0 +1,52 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+import armazenamento
+import cache_dados
+import esquema
+import indice
+
+# Visão consolidada da equipe: junta os conjuntos de dados de todos os usuários encontrados no diretório.
+# Disponível apenas para os usuários em MAESTRO_SUPERVISORES
+SUPERVISORES = {u.strip() for u in os.environ.get('MAESTRO_SUPERVISORES', '').split(',') if u.strip()}
+
+# Quantidade de conjuntos de dados lidos ao mesmo tempo
+TRABALHADORES = int(os.environ.get('MAESTRO_CONSOLIDADO_TRABALHADORES', str(min(8, os.cpu_count() or 1))))
+
+# Arquivos que identificam os dados de um usuário (principal, deltas ou planilha legada ainda não migrada)
+_ARQUIVO_DADOS = re.compile(r'^dados_acumulados_(.+?)(_deltas|\.parquet|\.arrow|\.xlsx)$')
+
+_executor = ThreadPoolExecutor(max_workers=TRABALHADORES, thread_name_prefix='consolidado')
+
+def permitido(usuario):
+    return usuario in SUPERVISORES
+
+# Função para descobrir os usuários com dados no diretório atual
+def usuarios():
+    encontrados = set()
+    for nome in os.listdir('.'):
+        encontrado = _ARQUIVO_DADOS.match(nome)
+        if encontrado:
+            encontrados.add(encontrado.group(1))
+    return sorted(encontrados)
+
+def _versao(usuario):
+    return usuario, armazenamento.versao(usuario)
+
+# Função para obter a versão dos dados de cada usuário: ((usuário, versão), ...), em ordem de usuário
+def versoes(lista=None):
+    return tuple(_executor.map(_versao, usuarios() if lista is None else lista))
+
+# Junta a tabela derivada (rollup, esboços ou pontos) de todos os usuários; cada uma vem do cache por versão,
+# então apenas os conjuntos alterados desde a última consolidação são relidos (em paralelo). Rollups e esboços
+# se somam e os pontos são avaliados contra a referência de cada conjunto, então basta concatená-los
+def _consolidar(tabela, versoes_usuarios):
+    partes = [df for df in _executor.map(lambda par: cache_dados.obter_tabela(tabela, *par), versoes_usuarios) if not df.empty]
+    if not partes:
+        return tabela.vazia()
+    return indice.ordenar(esquema.concatenar(partes), tabela.coluna_data)
+
+# Função para obter a tabela derivada consolidada e seu índice temporal; 'versoes_usuarios' vem de versoes()
+def obter_indexado(tabela, versoes_usuarios=None):
+    versoes_usuarios = versoes() if versoes_usuarios is None else versoes_usuarios
+    return cache_dados.obter_consolidado(tabela, versoes_usuarios, lambda: _consolidar(tabela, versoes_usuarios))
@@ -1,35 +1,29 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import os
 from datetime import datetime
-from diario import diario  # Importa o diário de bordo
+import armazenamento
+import fila_ingestao
+import cache_dados
+import indice
+import metricas
+import perfil
+import indisponibilidade
+import consolidado
+import relatorios
+import agregados
+import atencao
+import esbocos
+import grafo
     
-# Função para carregar os dados do Excel do usuário logado
-def load_data(usuario):
-    excel_file = f'dados_acumulados_{usuario}.xlsx'  # Nome do arquivo específico do usuário
-    if os.path.exists(excel_file):
-        df_total = pd.read_excel(excel_file, engine='openpyxl')
-    else:
-        df_total = pd.DataFrame(columns=['NÚMERO DO PROTOCOLO', 'USUÁRIO QUE CONCLUIU A TAREFA', 'SITUAÇÃO DA TAREFA', 'TEMPO MÉDIO OPERACIONAL', 'DATA DE INÍCIO DA TAREFA'])
-    return df_total
-
-# Função para salvar os dados no Excel do usuário logado
-def save_data(df, usuario):
-    excel_file = f'dados_acumulados_{usuario}.xlsx'  # Nome do arquivo específico do usuário
-    df['TEMPO MÉDIO OPERACIONAL'] = df['TEMPO MÉDIO OPERACIONAL'].astype(str)
-    with pd.ExcelWriter(excel_file, engine='openpyxl', mode='w') as writer:
-        df.to_excel(writer, index=False)
-
-# Função para garantir que a coluna 'TEMPO MÉDIO OPERACIONAL' esteja no formato timedelta para cálculos
-def convert_to_timedelta_for_calculations(df):
-    df['TEMPO MÉDIO OPERACIONAL'] = pd.to_timedelta(df['TEMPO MÉDIO OPERACIONAL'], errors='coerce')
-    return df
+# Função para carregar os dados do usuário logado, pelo cache por versão (ver cache_dados.obter).
+# O DataFrame é compartilhado e somente leitura: quem precisar alterá-lo troca colunas numa cópia rasa
+@perfil.medido('load_data')
+def load_data(usuario, colunas=None):
+    return cache_dados.obter(usuario, colunas)
 
-# Função para garantir que a coluna 'DATA CRIAÇÃO DA TAREFA' esteja no formato de datetime
-def convert_to_datetime_for_calculations(df):
-    df['DATA DE INÍCIO DA TAREFA'] = pd.to_datetime(df['DATA DE INÍCIO DA TAREFA'], format='%d/%m/%Y %H:%M:%S', errors='coerce')
-    return df
+# Função para salvar os dados do usuário logado no armazenamento colunar
+def save_data(df, usuario):
+    armazenamento.salvar(df, usuario)
 
 # Função para formatar timedelta no formato HH:MM:SS
 def format_timedelta(td):
@@ -39,67 +33,146 @@ def format_timedelta(td):
     minutes, seconds = divmod(total_seconds, 60)
     return f"{minutes} min {seconds}s"
 
-# Função para calcular o TMO por dia
-def calcular_tmo_por_dia(df):
-    df['Dia'] = pd.to_datetime(df['DATA DE INÍCIO DA TAREFA']).dt.date
-    df_finalizados = df[df['SITUAÇÃO DA TAREFA'].isin(['Finalizada', 'Cancelada'])].copy()
-    
-    # Agrupando por dia
-    df_tmo = df_finalizados.groupby('Dia').agg(
-        Tempo_Total=('TEMPO MÉDIO OPERACIONAL', 'sum'),  # Soma total do tempo
-        Total_Finalizados_Cancelados=('SITUAÇÃO DA TAREFA', 'count')  # Total de tarefas finalizadas ou canceladas
-    ).reset_index()
-
-    # Calcula o TMO (Tempo Médio Operacional)
-    df_tmo['TMO'] = df_tmo['Tempo_Total'] / df_tmo['Total_Finalizados_Cancelados']
-    
-    # Formata o tempo médio no formato HH:MM:SS
-    df_tmo['TMO'] = df_tmo['TMO'].apply(format_timedelta)
-    return df_tmo[['Dia', 'TMO']]
-
-def calcular_tmo_por_dia_geral(df):
-    # Certifica-se de que a coluna de data está no formato correto
-    df['Dia'] = pd.to_datetime(df['DATA DE INÍCIO DA TAREFA']).dt.date
-
-    # Filtra tarefas finalizadas ou canceladas, pois estas são relevantes para o cálculo do TMO
-    df_finalizados = df[df['SITUAÇÃO DA TAREFA'].isin(['Finalizada', 'Cancelada'])].copy()
-    
-    # Agrupamento por dia para calcular o tempo médio diário
-    df_tmo = df_finalizados.groupby('Dia').agg(
-        Tempo_Total=('TEMPO MÉDIO OPERACIONAL', 'sum'),  # Soma total do tempo por dia
-        Total_Finalizados_Cancelados=('SITUAÇÃO DA TAREFA', 'count')  # Total de tarefas finalizadas/canceladas por dia
-    ).reset_index()
-
-    # Calcula o TMO (Tempo Médio Operacional) diário
-    df_tmo['TMO'] = df_tmo['Tempo_Total'] / df_tmo['Total_Finalizados_Cancelados']
-    
-    # Remove valores nulos e formata o tempo médio para o gráfico
-    df_tmo['TMO'] = df_tmo['TMO'].fillna(pd.Timedelta(seconds=0))  # Preenche com zero se houver NaN
-    df_tmo['TMO_Formatado'] = df_tmo['TMO'].apply(format_timedelta)  # Formata para exibição
-    
-    return df_tmo[['Dia', 'TMO', 'TMO_Formatado']]
-
-def calcular_produtividade_diaria(df):
-    # Garante que a coluna 'Próximo' esteja em formato de data
-    df['Dia'] = df['DATA DE INÍCIO DA TAREFA'].dt.date
-
-    # Agrupa e soma os status para calcular a produtividade
-    df_produtividade = df.groupby('Dia').agg(
-        Finalizado=('SITUAÇÃO DA TAREFA', lambda x: x[x == 'Finalizada'].count()),
-        Cancelada=('SITUAÇÃO DA TAREFA', lambda x: x[x == 'Cancelada'].count())
-    ).reset_index()
+# Função para formatar uma coluna de segundos no formato dos cartões (vazio onde não há valor).
+# graficos (Plotly) só é importado aqui, pois as telas que usam esta função já o carregam
+def formatar_segundos(segundos):
+    import graficos
+    return pd.Series(graficos.formatar_duracoes(segundos, nulo=''), index=segundos.index)
 
-    # Calcula a produtividade total
-    df_produtividade['Produtividade'] = + df_produtividade['Finalizado'] + df_produtividade['Cancelada']
-    return df_produtividade
+# Função para exibir os percentis do TMO (em segundos) lado a lado, no formato dos cartões
+def mostrar_percentis(valores):
+    for coluna, (percentil, segundos) in zip(st.columns(len(valores)), valores.items()):
+        with coluna:
+            with st.container(border=True):
+                st.metric(f"TMO p{percentil * 100:g}", format_timedelta(pd.to_timedelta(segundos, unit='s')))
+
+# Função para exibir na sidebar o andamento das ingestões do usuário
+def mostrar_ingestoes(usuario):
+    for trabalho in fila_ingestao.trabalhos(usuario):
+        arquivo = trabalho['arquivo']
+        if trabalho['status'] == fila_ingestao.NA_FILA:
+            st.sidebar.info(f'Arquivo "{arquivo}" aguardando processamento...')
+        elif trabalho['status'] == fila_ingestao.PROCESSANDO:
+            st.sidebar.progress(min(trabalho['lidas'] / max(trabalho['total'], 1), 1.0), text=f'"{arquivo}": {trabalho["lidas"]} de {trabalho["total"]} {trabalho["unidade"]} processadas')
+        elif trabalho['status'] == fila_ingestao.ERRO:
+            st.sidebar.error(f'Erro ao processar "{arquivo}": {trabalho["erro"]}')
+        elif trabalho['resultado']['status'] == 'ignorado':
+            st.sidebar.info(f'Arquivo "{arquivo}" já foi carregado anteriormente.')
+        else:
+            resultado = trabalho['resultado']
+            st.sidebar.success(f'Arquivo "{arquivo}" carregado e processado com sucesso! {resultado["novas"]} novas tarefas, {resultado["duplicadas"]} já existentes.')
+    # Os painéis continuam usando a versão anterior dos dados até a ingestão terminar
+    if fila_ingestao.em_andamento(usuario):
+        st.sidebar.button("Atualizar status")
+
+# Cálculos dos painéis (ver relatorios.py, usados também nos relatórios em lote) com medição opcional (ver perfil.py)
+calcular_tmo_por_dia = perfil.medido('calcular_tmo_por_dia')(relatorios.tmo_por_dia)
+calcular_produtividade_diaria = perfil.medido('calcular_produtividade_diaria')(relatorios.produtividade_diaria)
+calcular_tmo_por_analista = perfil.medido('calcular_tmo_por_analista')(relatorios.tmo_por_analista)
+calcular_metricas = perfil.medido('metricas.calcular')(metricas.calcular)
+
+# Grafo de cálculos dos painéis (ver grafo.py): cada nó só é recalculado quando a fonte, a versão dos dados,
+# o período ou o analista de que ele depende mudam; trocar o analista não refaz os cálculos da equipe.
+# As tabelas de origem (rollup, esboços, pontos) vêm do cache_dados a cada uso e não são memoizadas no grafo
+def _origem(tabela, fonte, versao):
+    if fonte == cache_dados.CONSOLIDADO:
+        return consolidado.obter_indexado(tabela, versao)
+    return cache_dados.obter_indexado(tabela, fonte, versao)
+
+@grafo.no('rollup', ['fonte', 'versao'], memoizar=False)
+def _rollup(fonte, versao):
+    return _origem(agregados.ROLLUP, fonte, versao)
+
+# O recorte contíguo do período é uma visão da tabela inteira: é copiado para que o valor memoizado não a
+# mantenha viva (nem fique fora da conta de memória do grafo). Os recortes por analista já são cópias
+@grafo.no('rollup_periodo', ['data_inicial', 'data_final'], ['rollup'])
+@perfil.medido('filtrar')
+def _rollup_periodo(rollup, data_inicial, data_final):
+    return indice.fatiar(*rollup, data_inicial, data_final).copy()
+
+@grafo.no('rollup_analista', ['data_inicial', 'data_final', 'analista'], ['rollup'])
+@perfil.medido('filtrar_analista')
+def _rollup_analista(rollup, data_inicial, data_final, analista):
+    return indice.fatiar(*rollup, data_inicial, data_final, analista)
+
+@grafo.no('analistas', dependencias=['rollup_periodo'])
+def _analistas(rollup_periodo):
+    return rollup_periodo['USUÁRIO QUE CONCLUIU A TAREFA'].unique()
+
+# Relatório gerado em lote (python relatorios.py) para a mesma versão dos dados e o mesmo período, se houver
+@grafo.no('relatorio', ['fonte', 'versao', 'data_inicial', 'data_final'])
+@perfil.medido('carregar_relatorio')
+def _relatorio(fonte, versao, data_inicial, data_final):
+    if fonte == cache_dados.CONSOLIDADO:
+        return None
+    return relatorios.carregar(fonte, versao, data_inicial, data_final)
+
+# Todos os indicadores do período são calculados em uma única passada (ou vêm do relatório pronto)
+@grafo.no('metricas_equipe', dependencias=['relatorio', 'rollup_periodo'])
+def _metricas_equipe(relatorio, rollup_periodo):
+    return relatorio.equipe if relatorio is not None else calcular_metricas(rollup_periodo)
+
+@grafo.no('metricas_analista', ['analista'], ['relatorio', 'rollup_analista'])
+def _metricas_analista(relatorio, rollup_analista, analista):
+    indicadores = relatorio.analista(analista) if relatorio is not None else None
+    return indicadores if indicadores is not None else calcular_metricas(rollup_analista)
+
+@grafo.no('produtividade_diaria', dependencias=['metricas_equipe'])
+def _produtividade_diaria(metricas_equipe):
+    return calcular_produtividade_diaria(metricas_equipe)
+
+@grafo.no('tmo_por_dia', dependencias=['metricas_equipe'])
+def _tmo_por_dia(metricas_equipe):
+    return calcular_tmo_por_dia(metricas_equipe)
+
+@grafo.no('tmo_por_analista', dependencias=['metricas_equipe'])
+def _tmo_por_analista(metricas_equipe):
+    return calcular_tmo_por_analista(metricas_equipe)
+
+@grafo.no('ranking', dependencias=['metricas_equipe'])
+def _ranking(metricas_equipe):
+    return relatorios.ranking(metricas_equipe)
+
+@grafo.no('tmo_por_dia_analista', dependencias=['metricas_analista'])
+def _tmo_por_dia_analista(metricas_analista):
+    return calcular_tmo_por_dia(metricas_analista)
+
+# Esboços da distribuição do TMO (ver esbocos.py): os percentis de qualquer período saem da soma dos
+# esboços diários, com custo independente da quantidade de tarefas
+@grafo.no('esboco', ['fonte', 'versao'], memoizar=False)
+@perfil.medido('carregar_esboco')
+def _esboco(fonte, versao):
+    return _origem(esbocos.ESBOCOS, fonte, versao)
+
+@grafo.no('percentis_equipe', ['data_inicial', 'data_final'], ['esboco'])
+def _percentis_equipe(esboco, data_inicial, data_final):
+    return esbocos.percentis(indice.fatiar(*esboco, data_inicial, data_final))
+
+@grafo.no('percentis_por_analista', ['data_inicial', 'data_final'], ['esboco'])
+def _percentis_por_analista(esboco, data_inicial, data_final):
+    return esbocos.percentis_por_analista(indice.fatiar(*esboco, data_inicial, data_final))
+
+@grafo.no('percentis_analista', ['data_inicial', 'data_final', 'analista'], ['esboco'])
+def _percentis_analista(esboco, data_inicial, data_final, analista):
+    return esbocos.percentis(indice.fatiar(*esboco, data_inicial, data_final, analista))
+
+# Pontos de atenção avaliados na ingestão (ver atencao.py); a visão só recorta a tabela pelo índice
+@grafo.no('pontos', ['fonte', 'versao'], memoizar=False)
+@perfil.medido('carregar_pontos')
+def _pontos(fonte, versao):
+    return _origem(atencao.PONTOS, fonte, versao)
+
+# Pontos do analista no período, dos mais recentes para os mais antigos
+@grafo.no('pontos_analista', ['data_inicial', 'data_final', 'analista'], ['pontos'])
+def _pontos_analista(pontos, data_inicial, data_final, analista):
+    return indice.fatiar(*pontos, data_inicial, data_final, analista).iloc[::-1]
 
 # Função principal da dashboard
 def dashboard():
     st.title("Dashboard de Produtividade")
     
-    # Carregar dados acumulados do arquivo Excel do usuário logado
     usuario_logado = st.session_state.usuario_logado  # Obtém o usuário logado
-    df_total = load_data(usuario_logado)  # Carrega dados específicos do usuário
+    perfil.iniciar(usuario_logado)
 
     st.sidebar.image("https://finchsolucoes.com.br/img/eb28739f-bef7-4366-9a17-6d629cf5e0d9.png", width=100)
     st.sidebar.text('')
@@ -108,49 +181,61 @@ def dashboard():
     st.sidebar.header("Navegação")
     opcao_selecionada = st.sidebar.selectbox("Escolha uma visão", ["Visão Geral", "Métricas Individuais", "Diário de Bordo"])
 
-    # Upload de planilha na sidebar
-    uploaded_file = st.sidebar.file_uploader("Carregar nova planilha", type=["xlsx"])
-
-    if uploaded_file is not None:
-        df_new = pd.read_excel(uploaded_file)
-        df_total = pd.concat([df_total, df_new], ignore_index=True)
-        save_data(df_total, usuario_logado)  # Atualiza a planilha específica do usuário
-        st.sidebar.success(f'Arquivo "{uploaded_file.name}" carregado e processado com sucesso!')
-
-    # Converte para timedelta e datetime apenas para operações temporárias
-    df_total = convert_to_timedelta_for_calculations(df_total)
-    df_total = convert_to_datetime_for_calculations(df_total)
-
-    custom_colors = ['#ff571c', '#7f2b0e', '#4c1908']
-
-    # Função para calcular TMO por dia
-    df_tmo = calcular_tmo_por_dia(df_total)
-
-    def calcular_tmo_por_analista(df):
-        df_finalizados = df[df['SITUAÇÃO DA TAREFA'].isin(['Finalizada', 'Cancelada'])].copy()
-
-        # Agrupando por analista
-        df_tmo_analista = df_finalizados.groupby('USUÁRIO QUE CONCLUIU A TAREFA').agg(
-            Tempo_Total=('TEMPO MÉDIO OPERACIONAL', 'sum'),  # Soma total do tempo por analista
-            Total_Tarefas=('SITUAÇÃO DA TAREFA', 'count')  # Total de tarefas finalizadas ou canceladas por analista
-        ).reset_index()
-
-        # Calcula o TMO (Tempo Médio Operacional) como média
-        df_tmo_analista['TMO'] = df_tmo_analista['Tempo_Total'] / df_tmo_analista['Total_Tarefas']
-
-        # Formata o tempo médio no formato de minutos e segundos
-        df_tmo_analista['TMO_Formatado'] = df_tmo_analista['TMO'].apply(format_timedelta)
-        return df_tmo_analista[['USUÁRIO QUE CONCLUIU A TAREFA', 'TMO_Formatado', 'TMO']]
-    
+    # Upload de planilha na sidebar (o Excel é apenas formato de importação/exportação)
+    uploaded_files = st.sidebar.file_uploader("Carregar novas planilhas", type=["xlsx"], accept_multiple_files=True)
+
+    if uploaded_files:
+        # A ingestão roda em segundo plano; reexecuções com os mesmos arquivos no widget reaproveitam o trabalho
+        fila_ingestao.enviar(usuario_logado, [(arquivo.name, arquivo.getvalue()) for arquivo in uploaded_files],
+                             envio=tuple(arquivo.file_id for arquivo in uploaded_files))
+    mostrar_ingestoes(usuario_logado)
+
+    # Exportação dos dados acumulados em Excel, gerada apenas sob demanda
+    if st.sidebar.button("Exportar Excel"):
+        st.sidebar.download_button(
+            "Baixar planilha",
+            data=armazenamento.exportar_excel(load_data(usuario_logado)),
+            file_name=f'dados_acumulados_{usuario_logado}.xlsx'
+        )
+
+    # As visões são servidas pelo rollup diário (dia, analista, situação, tarefa), mantido na ingestão
+    # e compartilhado entre as sessões pelo cache do processo
+    # Supervisores podem consolidar os dados de todos os usuários (ver consolidado.py)
+    consolidar = consolidado.permitido(usuario_logado) and st.sidebar.checkbox("Visão consolidada da equipe")
+    fonte = cache_dados.CONSOLIDADO if consolidar else usuario_logado
+    # Entradas dos nós do grafo de cálculos; o período e o analista entram conforme os widgets são lidos
+    contexto = {'fonte': fonte}
+    if opcao_selecionada != "Diário de Bordo":
+        # Plotly só é carregado pelas visões com gráficos
+        import graficos
+        if consolidar:
+            with perfil.secao('carregar_rollup_consolidado') as medida:
+                versao = consolidado.versoes()
+                contexto['versao'] = versao
+                rollup, indice_rollup = grafo.calcular('rollup', contexto)
+                medida['linhas'] = len(rollup)
+            st.sidebar.caption(f"Consolidando os dados de {len(versao)} usuários")
+        else:
+            versao = armazenamento.versao(usuario_logado)
+            contexto['versao'] = versao
+            with perfil.secao('carregar_rollup') as medida:
+                rollup, indice_rollup = grafo.calcular('rollup', contexto)
+                medida['linhas'] = len(rollup)
+        min_date, max_date = indice_rollup.limites()
+        min_date = min_date or datetime.today().date()
+        max_date = max_date or datetime.today().date()
+
+    # Figuras guardadas em cache por versão dos dados, período e analista; só são montadas quando algo disso muda
+    def mostrar_grafico(nome, construir, analista=None):
+        chave = (fonte, versao, nome, data_inicial, data_final, analista)
+        figura = cache_dados.obter_figura(chave, perfil.medido(f'construir: {nome}')(construir))
+        perfil.plotly_chart(nome, figura)
 
     # Verifica qual opção foi escolhida no dropdown
     if opcao_selecionada == "Visão Geral":
         st.header("Visão Geral")
 
             # Adiciona filtros de datas 
-        min_date = df_total['DATA DE INÍCIO DA TAREFA'].min().date() if not df_total.empty else datetime.today().date()
-        max_date = df_total['DATA DE INÍCIO DA TAREFA'].max().date() if not df_total.empty else datetime.today().date()
-
         col1, col2 = st.columns(2)
         with col1:
             data_inicial = st.date_input("Data Inicial", min_date)
@@ -160,18 +245,12 @@ def dashboard():
         if data_inicial > data_final:
             st.sidebar.error("A data inicial não pode ser posterior à data final!")
 
-        df_total = df_total[(df_total['DATA DE INÍCIO DA TAREFA'].dt.date >= data_inicial) & (df_total['DATA DE INÍCIO DA TAREFA'].dt.date <= data_final)]
-
-        total_finalizados = len(df_total[df_total['SITUAÇÃO DA TAREFA'] == 'Finalizada'])
-        total_reclass = len(df_total[df_total['SITUAÇÃO DA TAREFA'] == 'Cancelada'])
-        # Verifique se o denominador não é zero
-        if (total_finalizados + total_reclass) > 0:
-            # Se houver cadastros finalizados ou reclassificados, calcula o tempo médio
-            tempo_medio = (df_total[df_total['SITUAÇÃO DA TAREFA'] == 'Finalizada']['TEMPO MÉDIO OPERACIONAL'].sum() + 
-                        df_total[df_total['SITUAÇÃO DA TAREFA'] == 'Cancelada']['TEMPO MÉDIO OPERACIONAL'].sum()) / (total_finalizados + total_reclass)
-        else:
-            # Se não houver cadastros finalizados ou reclassificados, define o tempo médio como zero ou outro valor padrão
-            tempo_medio = pd.Timedelta(0)  # ou "0 min"
+        contexto.update(data_inicial=data_inicial, data_final=data_final)
+        indicadores = grafo.calcular('metricas_equipe', contexto)
+        total_finalizados = indicadores.total_finalizadas
+        total_reclass = indicadores.total_canceladas
+        # Tempo médio das tarefas finalizadas e canceladas (zero se não houver nenhuma)
+        tempo_medio = pd.Timedelta(seconds=indicadores.tempo_medio)
 
         # with st.container(border=True):
         #     col1, col2, col3 = st.columns(3)
@@ -198,8 +277,6 @@ def dashboard():
             with st.container(border=True):
                 st.metric("Tempo Médio por Cadastro", format_timedelta(tempo_medio))
 
-        df_produtividade = calcular_produtividade_diaria(df_total)
-
         # melhor_dia = df_produtividade.loc[df_produtividade['Produtividade'].idxmax()]
         # with col1:
         #     st.success("Melhor Dia de Produtividade: " + str(melhor_dia['Dia']) + " - " + str(melhor_dia['Produtividade']) + " Cadastros")
@@ -213,101 +290,66 @@ def dashboard():
         with col1:      
             with st.container(border=True):
                 st.subheader("Produtividade Diária")
-                fig_produtividade = px.line(
-                    df_produtividade,
-                    x='Dia',
-                    y='Produtividade',
-                    title='Produtividade Diária',
-                    color_discrete_sequence=custom_colors,
-                    labels={'Produtividade': 'Total de Cadastros'},
-                    line_shape='linear',
-                    markers=True
-                )
-                fig_produtividade.update_traces(
-                    hovertemplate='Dia = %{x|%d/%m/%Y}<br>Produtividade = %{y}'
-                )
-                st.plotly_chart(fig_produtividade)
+                mostrar_grafico('produtividade', lambda: graficos.produtividade_diaria(grafo.calcular('produtividade_diaria', contexto)))
 
         with col2:
             with st.container(border=True):
                 st.subheader("TMO por Dia da Equipe")
-                df_tmo = calcular_tmo_por_dia_geral(df_total)
-                fig_tmo = px.line(
-                    df_tmo,
-                    x='Dia',
-                    y=df_tmo['TMO'].dt.total_seconds() / 60,  # Converte TMO para minutos
-                    title='TMO por Dia da Equipe (em minutos)',
-                    labels={'y': 'Tempo Médio Operacional (min)', 'Dia': 'Data'},
-                    line_shape='linear',
-                    markers=True,
-                    color_discrete_sequence=custom_colors
-                )
-                fig_tmo.update_traces(
-                    hovertemplate='Data = %{x|%d/%m/%Y}<br>TMO = %{text}',
-                    text=df_tmo['TMO_Formatado']
-                )
-                st.plotly_chart(fig_tmo)
+                mostrar_grafico('tmo', lambda: graficos.tmo_por_dia(grafo.calcular('tmo_por_dia', contexto)))
+
+        # Produtividade e indisponibilidade do sistema no mesmo dia (totais diários já calculados no registro).
+        # A indisponibilidade é registrada por usuário: na visão consolidada, soma a de todos os usuários consolidados
+        if consolidar:
+            totais_indisponibilidade = indisponibilidade.totais_diarios_equipe([u for u, _ in versao], data_inicial, data_final)
+            titulo_indisponibilidade = "Produtividade x Indisponibilidade do Sistema (soma dos usuários)"
+        else:
+            totais_indisponibilidade = indisponibilidade.totais_diarios(usuario_logado, data_inicial, data_final)
+            titulo_indisponibilidade = "Produtividade x Indisponibilidade do Sistema"
+        if not totais_indisponibilidade.empty:
+            with st.expander(titulo_indisponibilidade):
+                df_dias = indisponibilidade.juntar_produtividade(grafo.calcular('produtividade_diaria', contexto), totais_indisponibilidade)
+                df_dias = df_dias[df_dias['Indisponibilidade'] > 0]
+                st.dataframe(pd.DataFrame({
+                    'Dia': df_dias['Dia'].dt.strftime('%d/%m/%Y'),
+                    'Produtividade': df_dias['Produtividade'],
+                    'Indisponibilidade': df_dias['Indisponibilidade'].map(indisponibilidade.formatar),
+                }).reset_index(drop=True))
 
         # Gráfico de pizza para o status
         with st.container(border=True):
             st.subheader("Status das Tarefas")
-            fig_status = px.pie(
-                names=['Finalizada', 'Cancelado'],
-                values=[total_finalizados, total_reclass],
-                title='Distribuição de Status',
-                color_discrete_sequence=custom_colors
-            )
-            fig_status.update_traces(
-                hovertemplate='Tarefas %{label} = %{value}<extra></extra>',
-            )
-            st.plotly_chart(fig_status)
+            mostrar_grafico('status', lambda: graficos.status(total_finalizados, total_reclass))
 
         with st.container(border=True):
-            # Calcula o TMO por analista e exibe o gráfico
-            df_tmo_analista = calcular_tmo_por_analista(df_total)
-            
             # Gráfico de barras de TMO por analista em minutos
             st.subheader("Tempo Médio de Operação (TMO) por Analista")
-            fig_tmo_analista = px.bar(
-                df_tmo_analista,
-                x='USUÁRIO QUE CONCLUIU A TAREFA',
-                y=df_tmo_analista['TMO'].dt.total_seconds() / 60,  # TMO em minutos
-                title='TMO por Analista (em minutos e segundos)',
-                labels={'y': 'TMO (min)', 'USUÁRIO QUE CONCLUIU A TAREFA': 'Analista'},
-                text=df_tmo_analista['TMO_Formatado'],
-                color_discrete_sequence=custom_colors
-            )
-            fig_tmo_analista.update_traces(
-                textposition='outside',  # Exibe o tempo formatado fora das barras
-                hovertemplate='Analista = %{x}<br>TMO = %{text}<extra></extra>',
-                text=df_tmo_analista['TMO_Formatado']
-            )
-            st.plotly_chart(fig_tmo_analista)
+            mostrar_grafico('tmo_analista', lambda: graficos.tmo_por_analista(grafo.calcular('tmo_por_analista', contexto)))
+
+        with st.container(border=True):
+            st.subheader("Distribuição do TMO")
+            mostrar_percentis(grafo.calcular('percentis_equipe', contexto))
+            df_percentis = grafo.calcular('percentis_por_analista', contexto)
+            colunas_percentis = [c for c in df_percentis.columns if c.startswith('p')]
+            df_percentis = df_percentis.rename(columns={'USUÁRIO QUE CONCLUIU A TAREFA': 'Analista'}).assign(
+                **{c: formatar_segundos(df_percentis[c]) for c in colunas_percentis})
+            st.dataframe(df_percentis, hide_index=True, width=1080)
 
         with st.container(border=True):
             # Gráfico de ranking dinâmico
             st.subheader("Ranking Dinâmico")
-            df_ranking = df_total.groupby('USUÁRIO QUE CONCLUIU A TAREFA').agg(
-                Finalizado=('SITUAÇÃO DA TAREFA', lambda x: x[x == 'Finalizada'].count()),
-                Cancelado=('SITUAÇÃO DA TAREFA', lambda x: x[x == 'Cancelada'].count())
-            ).reset_index()
-            df_ranking['Total'] = df_ranking['Finalizado'] + df_ranking['Cancelado']
-            df_ranking = df_ranking.sort_values(by='Total', ascending=False).reset_index(drop=True)
-            df_ranking.index += 1
-            df_ranking.index.name = 'Posição'
-            df_ranking = df_ranking.rename(columns={'USUÁRIO QUE CONCLUIU A TAREFA': 'Usuário', 'Finalizado': 'Finalizado', 'Cancelada': 'Cancelada'})
+            df_ranking = grafo.calcular('ranking', contexto)
             st.dataframe(df_ranking.style.format({'Finalizado': '{:.0f}', 'Cancelado': '{:.0f}'}), width=1080)
 
     elif opcao_selecionada == "Diário de Bordo":
-        diario()
+        # O diário de bordo é importado apenas quando a visão é aberta
+        from diario import diario
+        with perfil.secao('diario'):
+            diario()
 
     elif opcao_selecionada == "Métricas Individuais":
         st.header("Métricas Individuais")
         # Adiciona filtros de datas 
         st.subheader("Filtro por Data")
-        min_date = df_total['DATA DE INÍCIO DA TAREFA'].min().date() if not df_total.empty else datetime.today().date()
-        max_date = df_total['DATA DE INÍCIO DA TAREFA'].max().date() if not df_total.empty else datetime.today().date()
-
         col1, col2 = st.columns(2)
         with col1:
             data_inicial = st.date_input("Data Inicial", min_date)
@@ -317,26 +359,19 @@ def dashboard():
         if data_inicial > data_final:
             st.error("A data inicial não pode ser posterior à data final!")
 
-        df_total = df_total[(df_total['DATA DE INÍCIO DA TAREFA'].dt.date >= data_inicial) & (df_total['DATA DE INÍCIO DA TAREFA'].dt.date <= data_final)]
-        analista_selecionado = st.selectbox('Selecione o analista', df_total['USUÁRIO QUE CONCLUIU A TAREFA'].unique())
-        df_analista = df_total[df_total['USUÁRIO QUE CONCLUIU A TAREFA'] == analista_selecionado].copy()
+        contexto.update(data_inicial=data_inicial, data_final=data_final)
+        analista_selecionado = st.selectbox('Selecione o analista', grafo.calcular('analistas', contexto))
+        contexto['analista'] = analista_selecionado
 
-        total_geral_analista = len(df_analista[(df_analista['SITUAÇÃO DA TAREFA'] == 'Finalizada') | (df_analista['SITUAÇÃO DA TAREFA'] == 'Cancelada')])
-        total_finalizados_analista = len(df_analista[df_analista['SITUAÇÃO DA TAREFA'] == 'Finalizada'])
-        total_reclass_analista = len(df_analista[df_analista['SITUAÇÃO DA TAREFA'] == 'Cancelada'])
         # Calcula o TMO, quantidade de finalizados e reclassificações apenas para o analista especifico
-        total_finalizados = len(df_analista[df_analista['SITUAÇÃO DA TAREFA'] == 'Finalizada'])
-        total_reclass = len(df_analista[df_analista['SITUAÇÃO DA TAREFA'] == 'Cancelada'])
-        # Verifique se o denominador não é zero
-        if (total_finalizados + total_reclass) > 0:
-            # Se houver cadastros finalizados ou reclassificados, calcula o tempo médio
-            tempo_medio_analista = (df_analista[df_analista['SITUAÇÃO DA TAREFA'] == 'Finalizada']['TEMPO MÉDIO OPERACIONAL'].sum() + 
-                        df_analista[df_analista['SITUAÇÃO DA TAREFA'] == 'Cancelada']['TEMPO MÉDIO OPERACIONAL'].sum()) / (total_finalizados + total_reclass)
-        else:
-            # Se não houver cadastros finalizados ou reclassificados, define o tempo médio como zero ou outro valor padrão
-            tempo_medio_analista = pd.Timedelta(0)  # ou "0 min"
-
-        tmo_equipe = df_total[df_total['SITUAÇÃO DA TAREFA'] == 'Finalizada']['TEMPO MÉDIO OPERACIONAL'].mean()
+        indicadores_analista = grafo.calcular('metricas_analista', contexto)
+        total_finalizados_analista = indicadores_analista.total_finalizadas
+        total_reclass_analista = indicadores_analista.total_canceladas
+        total_geral_analista = indicadores_analista.total_geral
+        tempo_medio_analista = pd.Timedelta(seconds=indicadores_analista.tempo_medio)
+
+        # TMO das tarefas finalizadas da equipe no período (NaT se não houver)
+        tmo_equipe = pd.to_timedelta(grafo.calcular('metricas_equipe', contexto).tmo_finalizadas, unit='s')
         
         col1, col2, col3, col4 = st.columns(4)
 
@@ -363,11 +398,12 @@ def dashboard():
                 else:
                     st.metric(f"Tempo Médio por Cadastro", 'Nenhum dado encontrado')
 
+        mostrar_percentis(grafo.calcular('percentis_analista', contexto))
+
         with st.container(border=True):
             st.subheader(f"Tarefas Realizadas por {analista_selecionado}")
-            if 'TAREFA' in df_analista.columns:
-                carteiras_analista = df_analista['TAREFA'].dropna().value_counts().reset_index()
-                carteiras_analista.columns = ['TAREFA', 'Quantidade']
+            if not indicadores_analista.por_tarefa.empty:
+                carteiras_analista = indicadores_analista.por_tarefa
                 carteiras_analista = carteiras_analista.sort_values(by='Quantidade', ascending=False).reset_index(drop=True)
                 carteiras_analista = carteiras_analista.rename(columns={'TAREFA': 'Tarefa', 'Quantidade': 'Quantidade'})
                 # Ajuste aqui para aplicar hide_index na função st.dataframe
@@ -384,104 +420,51 @@ def dashboard():
         with col1:
             with st.container(border=True):
                 st.subheader(f"Distribuição de Status de {analista_selecionado}")
-                fig_status_analista = px.pie(
-                    names=['Finalizado', 'Reclassificado'],
-                    values=[total_finalizados_analista, total_reclass_analista],
-                    title=f'Distribuição de Status - {analista_selecionado}',
-                    color_discrete_sequence=custom_colors
-                )
-                
-                fig_status_analista.update_traces(
-                    hovertemplate='Tarefas %{label} = %{value}<extra></extra>',
-                )
-
-                fig_status_analista.update_layout(
-                    legend=dict(
-                        orientation="h",
-                        yanchor="top",
-                        y=-0.1,
-                        xanchor="center",
-                        x=0.5
-                    )
-                )
-
-                st.plotly_chart(fig_status_analista)
+                mostrar_grafico('status_analista', lambda: graficos.status_analista(total_finalizados_analista, total_reclass_analista, analista_selecionado), analista_selecionado)
 
         # Gráfico de pizza para as tarefas feitas pelo analista
         with col2:
             with st.container(border=True):
                 st.subheader(f"Tarefas Realizadas por {analista_selecionado}")
                 
-                if 'TAREFA' in df_analista.columns:
-                    tarefas_feitas_analista = df_analista['TAREFA'].dropna().value_counts().reset_index()
-                    tarefas_feitas_analista.columns = ['Tarefa', 'Quantidade']
-
-                    fig_tarefas_feitas_analista = px.pie(
-                        names=tarefas_feitas_analista['Tarefa'],
-                        values=tarefas_feitas_analista['Quantidade'],
-                        title=f'Tarefas Feitas - {analista_selecionado}',
-                        color_discrete_sequence=custom_colors
-                    )
-
-                    fig_tarefas_feitas_analista.update_traces(
-                        hovertemplate='Tarefas %{label} = %{value}<extra></extra>',
-                    )
-
-                    fig_tarefas_feitas_analista.update_layout(
-                        legend=dict(
-                            orientation="h",
-                            yanchor="top",
-                            y=-0.1,
-                            xanchor="center",
-                            x=0.5
-                        )
-                    )
-
-                    st.plotly_chart(fig_tarefas_feitas_analista)
+                if not indicadores_analista.por_tarefa.empty:
+                    mostrar_grafico('tarefas_feitas_analista', lambda: graficos.tarefas_analista(indicadores_analista.por_tarefa, analista_selecionado), analista_selecionado)
                 else:
                     st.write("A coluna 'TAREFA' não foi encontrada no dataframe.")
 
         # Gráfico de barras para o tempo médio do analista por dia
         with st.container(border=True):
             st.subheader(f"Tempo Médio por Dia - {analista_selecionado}")
-            df_tmo_analista = calcular_tmo_por_dia(df_analista)
-
-            # Converte a coluna "TMO" para minutos e segundos
-            df_tmo_analista['TMO_segundos'] = df_tmo_analista['TMO'].apply(lambda x: int(x.split(' min')[0]) * 60 + int(x.split('s')[0].split(' min')[1]))
-            df_tmo_analista['TMO_minutos'] = df_tmo_analista['TMO_segundos'] / 60
-
-            # Cria o gráfico de barras
-            fig_tmo_analista = px.bar(
-                df_tmo_analista, x='Dia', 
-                y='TMO_minutos', 
-                title=f'Tempo Médio por Dia - {analista_selecionado}',
-                labels={'y': 'TMO (min)', 'Dia': 'Dia'},
-                text=df_tmo_analista['TMO'],  # Exibe o tempo formatado fora das barras
-                color_discrete_sequence=custom_colors
-            )
-            fig_tmo_analista.update_traces(
-                hovertemplate='Data = %{x|%d/%m/%Y}<br>TMO = %{text}',
-                text=df_tmo_analista['TMO']  # Exibe o tempo formatado fora das barras
-            )
-            st.plotly_chart(fig_tmo_analista)
+            df_tmo_analista = grafo.calcular('tmo_por_dia_analista', contexto)
+            mostrar_grafico('tmo_por_dia_analista', lambda: graficos.tmo_por_dia_analista(df_tmo_analista, analista_selecionado), analista_selecionado)
 
         # st.write(df_tmo_analista)
 
-        # # Tabela de pontos de atenção
-        # st.subheader("Pontos de Atenção")
-        # pontos_de_atencao_analista = get_points_of_attention(df_analista)
-        # if not pontos_de_atencao_analista.empty:
-        #     st.write(pontos_de_atencao_analista[['Protocolo', 'Tempo de Análise', 'Próximo']].assign(
-        #         **{'Tempo de Análise': pontos_de_atencao_analista['Tempo de Análise'].apply(format_timedelta)}
-        #     ).to_html(index=False, justify='left'), unsafe_allow_html=True)
-        # else:
-        #     st.write("Nenhum ponto de atenção identificado para este analista.")    
+        # Tabela de pontos de atenção: tarefas muito acima da referência recente do mesmo tipo de tarefa
+        with st.container(border=True):
+            st.subheader("Pontos de Atenção")
+            pontos_de_atencao_analista = grafo.calcular('pontos_analista', contexto)
+            if not pontos_de_atencao_analista.empty:
+                st.dataframe(pd.DataFrame({
+                    'Protocolo': pontos_de_atencao_analista['NÚMERO DO PROTOCOLO'],
+                    'Tarefa': pontos_de_atencao_analista['TAREFA'],
+                    'Data': pontos_de_atencao_analista['DATA DE INÍCIO DA TAREFA'].dt.strftime('%d/%m/%Y %H:%M'),
+                    'Tempo de Análise': formatar_segundos(pontos_de_atencao_analista['TEMPO MÉDIO OPERACIONAL']),
+                    'Referência da Equipe': formatar_segundos(pontos_de_atencao_analista['Referencia_Equipe']),
+                    'Referência do Analista': formatar_segundos(pontos_de_atencao_analista['Referencia_Analista']),
+                    'Acima da referência': pontos_de_atencao_analista['Motivo'],
+                }), hide_index=True, width=1080)
+            else:
+                st.write("Nenhum ponto de atenção identificado para este analista.")
 
     # # Botão para salvar a planilha atualizada
     # if st.sidebar.button("Salvar Dados"):
     #     save_data(df_total, usuario_logado)  # Salva dados específicos do usuário
     #     st.sidebar.success("Dados salvos com sucesso!")
 
+    # Painel de desempenho (apenas administradores)
+    perfil.painel(usuario_logado)
+
     if st.sidebar.button("Logout"):
         st.session_state.logado = False
         st.session_state.usuario_logado = None
@@ -0,0 +1,98 @@
+import os
+import json
+import uuid
+from dataclasses import dataclass
+import armazenamento
+
+# Tabelas derivadas dos dados de cada usuário (ex.: rollup diário), mantidas na ingestão e reconstruídas
+# só quando ficam defasadas. A versão dos dados que uma tabela representa vai no rodapé do próprio Parquet:
+# tabela e versão são gravadas com uma única troca atômica de arquivo e lidas juntas
+_CHAVE_VERSAO = b'maestro_versao'
+
+# Versões são tuplas em memória e listas depois de gravadas; a comparação é feita na forma gravada
+def _normalizar(versao):
+    return json.loads(json.dumps(versao))
+
+# Grava a tabela com a versão no rodapé; o temporário tem nome único, pois vários gravadores podem
+# reconstruir a mesma tabela ao mesmo tempo (vale a última troca)
+def _gravar_tabela(df, destino, versao):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    metadados = dict(tabela.schema.metadata or {})
+    metadados[_CHAVE_VERSAO] = json.dumps(versao).encode('utf-8')
+    temporario = f'{destino}.{uuid.uuid4().hex}.tmp'
+    pq.write_table(tabela.replace_schema_metadata(metadados), temporario)
+    os.replace(temporario, destino)
+
+# Lê a tabela se ela existir e representar a versão pedida (None caso contrário)
+def _ler_tabela(origem, versao):
+    import pyarrow.parquet as pq
+    if not os.path.exists(origem):
+        return None
+    tabela = pq.read_table(origem)
+    gravada = (tabela.schema.metadata or {}).get(_CHAVE_VERSAO)
+    if gravada is None or json.loads(gravada) != _normalizar(versao):
+        return None
+    return tabela.to_pandas()
+
+@dataclass
+class TabelaDerivada:
+    nome: str
+    colunas: list  # colunas do histórico lidas na reconstrução
+    vazia: object  # () -> tabela principal vazia
+    calcular: object  # histórico -> tupla de tabelas (uma por parte)
+    iniciar: object  # usuário -> delta vazio, antes do primeiro lote de uma ingestão
+    acumular: object  # (delta, lote) -> delta com o lote, ou None se o lote exigir recalcular tudo
+    juntar: object  # (tabelas gravadas, delta) -> tabelas atualizadas
+    coluna_data: str = 'Dia'  # coluna pela qual a tabela é ordenada e indexada
+    partes: tuple = (None,)  # arquivos da tabela: None é o principal; os demais levam o nome da parte
+
+    def caminho(self, usuario, parte=None):
+        return f'{self.nome}_{usuario}.parquet' if parte is None else f'{self.nome}_{usuario}.{parte}.parquet'
+
+    # Tabelas gravadas para a versão dos dados, ou None se alguma parte estiver ausente ou defasada
+    def ler(self, usuario, versao):
+        tabelas = tuple(_ler_tabela(self.caminho(usuario, parte), versao) for parte in self.partes)
+        return None if any(t is None for t in tabelas) else tabelas
+
+    def gravar(self, usuario, versao, tabelas):
+        for parte, df in zip(self.partes, tabelas):
+            _gravar_tabela(df, self.caminho(usuario, parte), versao)
+        # Versões anteriores ficavam num JSON separado, que deixa de ser usado
+        legado = f'{self.nome}_{usuario}.versao.json'
+        if os.path.exists(legado):
+            os.remove(legado)
+
+    # Recalcula a partir de todo o histórico; a versão gravada é a dos arquivos efetivamente lidos
+    def reconstruir(self, usuario):
+        df, versao = armazenamento.carregar_versionado(usuario, self.colunas)
+        tabelas = self.calcular(df)
+        self.gravar(usuario, versao, tabelas)
+        return tabelas
+
+    # Tabelas da versão pedida (a atual, se omitida), reconstruídas se estiverem defasadas
+    def carregar(self, usuario, versao=None):
+        tabelas = self.ler(usuario, versao or armazenamento.versao(usuario))
+        return tabelas if tabelas is not None else self.reconstruir(usuario)
+
+    # Soma às tabelas gravadas o delta de uma ingestão que levou os dados de versao_anterior a versao_nova
+    def somar(self, usuario, delta, versao_anterior, versao_nova):
+        atuais = self.ler(usuario, versao_anterior) if delta is not None else None
+        if atuais is None:
+            # O delta não pode ser somado ou as tabelas não correspondem aos dados anteriores a ele:
+            # recalcula tudo uma única vez
+            return self.reconstruir(usuario)
+        tabelas = self.juntar(atuais, delta)
+        self.gravar(usuario, versao_nova, tabelas)
+        return tabelas
+
+    # Soma às tabelas apenas as linhas recém-gravadas
+    def atualizar(self, usuario, df_delta, versao_anterior, versao_nova):
+        return self.somar(usuario, self.acumular(self.iniciar(usuario), df_delta), versao_anterior, versao_nova)
+
+    # Mantém as tabelas válidas após uma compactação (os dados mudam de arquivo, não de conteúdo)
+    def renovar(self, usuario, versao_anterior, versao_nova):
+        atuais = self.ler(usuario, versao_anterior)
+        if atuais is not None:
+            self.gravar(usuario, versao_nova, atuais)
@@ -1,29 +1,31 @@
 import streamlit as st
-import os
 from datetime import datetime, timedelta
 import pandas as pd
+import anotacoes as notas
+import indisponibilidade
 
-# Função para carregar as anotações do diário de bordo do usuário a partir de um arquivo .txt
-def load_diario(usuario):
-    file_path = f'diario_bordo_{usuario}.txt'
-    if os.path.exists(file_path):
-        with open(file_path, 'r', encoding='utf-8') as file:
-            anotacoes = file.readlines()
-    else:
-        anotacoes = []
-    return anotacoes
+# Quantidade de anotações exibidas por página (as mais recentes primeiro)
+TAMANHO_PAGINA = 30
+
+# Função para contar as anotações do usuário que atendem aos filtros de busca
+def contar_anotacoes(usuario, termos=None, data_inicial=None, data_final=None):
+    return notas.contar(usuario, termos, data_inicial, data_final)
+
+# Função para carregar uma página de anotações, da mais recente para a mais antiga (página 0 = mais recentes)
+def load_pagina(usuario, pagina=0, tamanho_pagina=TAMANHO_PAGINA, termos=None, data_inicial=None, data_final=None):
+    encontradas = notas.buscar(usuario, termos, data_inicial, data_final, limite=tamanho_pagina, deslocamento=pagina * tamanho_pagina)
+    return [notas.formatar(data, texto) for data, texto in encontradas]
 
-# Função para salvar uma nova anotação no arquivo .txt do usuário
+# Função para salvar uma nova anotação no banco de anotações do usuário
 def save_anotacao(usuario, anotacao):
-    file_path = f'diario_bordo_{usuario}.txt'
-    with open(file_path, 'a', encoding='utf-8') as file:
-        file.write(f"{datetime.now().strftime('%d/%m/%Y %H:%M')} - {anotacao}\n")
+    notas.adicionar(usuario, anotacao)
 
-# Função para salvar o tempo de indisponibilidade
-def save_indisponibilidade(usuario, inicio, fim, duracao):
-    file_path = f'indisponibilidade_{usuario}.txt'
-    with open(file_path, 'a', encoding='utf-8') as file:
-        file.write(f"{inicio} - {fim} | Duração: {duracao}\n")
+# Função para salvar uma indisponibilidade (início e fim com data e hora) no registro do usuário
+def save_indisponibilidade(usuario, inicio, fim):
+    return indisponibilidade.registrar(usuario, inicio, fim)
+
+def _mais_uma_pagina():
+    st.session_state.paginas_diario += 1
 
 # Função para exibir e adicionar anotações no diário de bordo
 def diario():
@@ -32,9 +34,6 @@ def diario():
     st.header("Diário de Bordo")
     
 
-    # Carregar anotações anteriores
-    anotacoes = load_diario(usuario_logado)
-
     # Área para adicionar uma nova anotação
     st.subheader("Nova Anotação")
     nova_anotacao = st.text_area("Escreva sua anotação aqui...")
@@ -47,9 +46,30 @@ def diario():
         else:
             st.error("A anotação não pode estar vazia!")
 
+    # Busca por palavras-chave e período (índice de texto completo do banco de anotações)
+    st.subheader("Buscar Anotações")
+    col1, col2 = st.columns(2)
+    termos = col1.text_input("Palavras-chave")
+    filtrar_periodo = col2.checkbox("Filtrar por período")
+    data_inicial = data_final = None
+    if filtrar_periodo:
+        col1, col2 = st.columns(2)
+        data_inicial = col1.date_input("De", datetime.now().date() - timedelta(days=30))
+        data_final = col2.date_input("Até", datetime.now().date())
+    filtros = (termos.strip(), data_inicial, data_final)
+
+    # Carregar apenas as páginas de anotações já pedidas, começando pelas mais recentes
+    if st.session_state.get("filtros_diario") != filtros:
+        st.session_state.filtros_diario = filtros
+        st.session_state.paginas_diario = 1
+    total_anotacoes = contar_anotacoes(usuario_logado, *filtros)
+    anotacoes = []
+    for pagina in range(st.session_state.paginas_diario):
+        anotacoes += load_pagina(usuario_logado, pagina, TAMANHO_PAGINA, *filtros)
+
     # Exibir anotações anteriores
     if anotacoes:
-        st.subheader("Anotações anteriores")
+        st.subheader("Resultados da Busca" if any(filtros) else "Anotações anteriores")
         col1, col2, col3 = st.columns(3)
         for i, anotacao in enumerate(anotacoes):
             if i % 3 == 0:
@@ -58,6 +78,9 @@ def diario():
                 col2.info(anotacao.strip())
             else:
                 col3.info(anotacao.strip())
+        if len(anotacoes) < total_anotacoes:
+            st.caption(f"Exibindo as {len(anotacoes)} anotações mais recentes de {total_anotacoes}.")
+            st.button("Carregar anotações mais antigas", on_click=_mais_uma_pagina)
     else:
         st.info("Nenhuma anotação encontrada.")
 
@@ -75,10 +98,45 @@ def diario():
         tempo_passado = datetime.now() - st.session_state.start_time
         st.metric("Tempo passado", f"{tempo_passado.total_seconds() / 3600:.2f} horas")
         if st.button("Parar Timer"):
-            save_indisponibilidade(usuario_logado, st.session_state.start_time.strftime('%H:%M'), datetime.now().strftime('%H:%M'), str(tempo_passado))
-            st.success("Tempo de indisponibilidade salvo com sucesso!")
+            try:
+                save_indisponibilidade(usuario_logado, st.session_state.start_time, datetime.now())
+                st.success("Tempo de indisponibilidade salvo com sucesso!")
+            except ValueError as erro:
+                st.error(str(erro))
             st.session_state.start_time = None
 
+    # Totais de indisponibilidade (mantidos a cada registro, sem reler os registros)
+    st.subheader("Total de Indisponibilidade")
+    totais_diarios = indisponibilidade.totais_diarios(usuario_logado)
+    if not totais_diarios.empty:
+        hoje = datetime.now().date()
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Hoje", indisponibilidade.formatar(indisponibilidade.total(usuario_logado, hoje, hoje)))
+        col2.metric("Semana atual", indisponibilidade.formatar(indisponibilidade.total(usuario_logado, hoje - timedelta(days=hoje.weekday()), hoje)))
+        col3.metric("Total", indisponibilidade.formatar(totais_diarios['Indisponibilidade'].sum()))
+
+        totais_semanais = indisponibilidade.totais_semanais(usuario_logado)
+        with st.expander("Totais por semana e por dia"):
+            st.table(pd.DataFrame({
+                'Semana': totais_semanais['Semana'].dt.strftime('%d/%m/%Y'),
+                'Indisponibilidade': totais_semanais['Indisponibilidade'].map(indisponibilidade.formatar),
+            }).iloc[::-1])
+            st.table(pd.DataFrame({
+                'Dia': totais_diarios['Dia'].dt.strftime('%d/%m/%Y'),
+                'Indisponibilidade': totais_diarios['Indisponibilidade'].map(indisponibilidade.formatar),
+            }).iloc[::-1])
+
+        # Cada registro (início, fim e duração), dos mais recentes para os mais antigos
+        registros = indisponibilidade.intervalos(usuario_logado)
+        with st.expander("Registros de indisponibilidade"):
+            st.dataframe(pd.DataFrame({
+                'Início': registros['Início'].dt.strftime('%d/%m/%Y %H:%M'),
+                'Fim': registros['Fim'].dt.strftime('%d/%m/%Y %H:%M'),
+                'Duração': registros['Duração'].map(indisponibilidade.formatar),
+            }).iloc[::-1], hide_index=True, use_container_width=True)
+    else:
+        st.write("Nenhuma indisponibilidade registrada.")
+
     # # Área para registrar tempo de indisponibilidade
     # st.subheader("Registrar Indisponibilidade do Sistema")
     
@@ -95,50 +153,10 @@ def diario():
     #         # Verifica se o fim é após o início
     #         if fim_dt > inicio_dt:
     #             duracao = fim_dt - inicio_dt
-    #             save_indisponibilidade(usuario_logado, inicio_dt.strftime('%H:%M'), fim_dt.strftime('%H:%M'), str(duracao))
+    #             save_indisponibilidade(usuario_logado, inicio_dt, fim_dt)
     #             st.success("Indisponibilidade salva com sucesso!")
     #             st.rerun()  # Recarrega a página para atualizar a informação
     #         else:
     #             st.error("A hora de fim deve ser após a hora de início.")
     #     else:
     #         st.error("Ambos os campos de hora devem ser preenchidos.")
-
-    # # Calcular e exibir o total de horas de indisponibilidade
-    # total_indisponibilidade = timedelta()  # Inicializa o total
-    # registros = []  # Lista para armazenar os registros
-
-    # file_path = f'indisponibilidade_{usuario_logado}.txt'
-    # if os.path.exists(file_path):
-    #     with open(file_path, 'r', encoding='utf-8') as file:
-    #         for line in file:
-    #             parts = line.strip().split('| Duração: ')
-    #             if len(parts) == 2:
-    #                 duracao_str = parts[1].strip()  # Obtém a duração
-    #                 # A duração já está no formato de timedelta, então usamos isso diretamente
-    #                 try:
-    #                     # Extraindo a duração como timedelta
-    #                     h, m, s = map(int, duracao_str.split(':'))
-    #                     total_indisponibilidade += timedelta(hours=h, minutes=m, seconds=s)
-
-    #                     # Adiciona o registro à lista
-    #                     registros.append({
-    #                         'Início': parts[0].strip(),
-    #                         'Duração': duracao_str
-    #                     })
-    #                 except ValueError:
-    #                     st.warning(f"Formato de duração inválido na linha: {line.strip()}")  # Informa se o formato estiver incorreto
-
-    # st.subheader("Total de Indisponibilidade")
-    # if total_indisponibilidade.total_seconds() > 0:  # Verifica se o total é maior que zero
-    #     st.write(f"Total de Indisponibilidade: {total_indisponibilidade}")
-    # else:
-    #     st.write("Nenhuma indisponibilidade registrada.")
-
-    # # Exibir registros em formato de tabela
-    # if registros:
-    #     st.subheader("Registros de Indisponibilidade")
-    #     df_registros = pd.DataFrame(registros)
-    #     st.table(df_registros)
-    # else:
-    #     st.info("Nenhum registro de indisponibilidade encontrado.")
-
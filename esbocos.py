@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+import derivados
+import esquema
+
+# Esboços da distribuição do TMO por (dia, analista), no estilo do DDSketch: cada duração cai num balde de
+# largura logarítmica e o esboço guarda só a contagem de cada balde. Esboços se somam balde a balde, então
+# os percentis de qualquer período ou analista saem da soma dos esboços, sem reler as tarefas
+PRECISAO = 0.01  # erro relativo máximo dos percentis
+GAMA = (1 + PRECISAO) / (1 - PRECISAO)
+_LOG_GAMA = np.log(GAMA)
+
+# Percentis exibidos nos painéis
+PERCENTIS = (0.5, 0.9, 0.99)
+
+# Situações que entram no TMO (as mesmas do tempo médio em metricas)
+SITUACOES_TMO = ['Finalizada', 'Cancelada']
+
+CHAVES_ESBOCO = ['Dia', esquema.COLUNA_ANALISTA, 'Balde']
+COLUNAS_ESBOCO = CHAVES_ESBOCO + ['Quantidade']
+
+def esboco_vazio():
+    return pd.DataFrame({
+        'Dia': pd.Series(dtype='datetime64[ns]'),
+        esquema.COLUNA_ANALISTA: pd.Series(dtype='category'),
+        'Balde': pd.Series(dtype='int16'),
+        'Quantidade': pd.Series(dtype='int64'),
+    })
+
+# Função para converter durações em segundos no balde correspondente (durações de até 1s caem no balde 0)
+def baldes(segundos):
+    segundos = np.maximum(np.asarray(segundos, dtype=np.float64), 1)
+    return np.ceil(np.log(segundos) / _LOG_GAMA).astype(np.int16)
+
+# Função para obter o valor representativo (em segundos) de cada balde
+def valores(balde):
+    return 2 * GAMA ** np.asarray(balde, dtype=np.float64) / (GAMA + 1)
+
+# Função para montar os esboços de um conjunto de tarefas, com uma linha por (dia, analista, balde)
+def calcular_esboco(df):
+    if df.empty or esquema.COLUNA_SITUACAO not in df.columns:
+        return esboco_vazio()
+    df = esquema.garantir_normalizado(df)
+    df = df[df[esquema.COLUNA_SITUACAO].isin(SITUACOES_TMO)]
+    if df.empty:
+        return esboco_vazio()
+    base = pd.DataFrame({
+        'Dia': df[esquema.COLUNA_DATA].dt.normalize(),
+        esquema.COLUNA_ANALISTA: df[esquema.COLUNA_ANALISTA],
+        # Tempos ausentes contam como zero, como no tempo total do rollup
+        'Balde': baldes(df[esquema.COLUNA_TEMPO].astype('float64').fillna(0).to_numpy()),
+        'Quantidade': 1,
+    })
+    return _reagrupar(base)
+
+def _reagrupar(df):
+    df = df.astype({esquema.COLUNA_ANALISTA: object})
+    esboco = df.groupby(CHAVES_ESBOCO, dropna=False, sort=True)['Quantidade'].sum().reset_index()
+    esboco = esboco.astype({'Balde': 'int16', 'Quantidade': 'int64'})
+    return esquema.categorizar(esboco[COLUNAS_ESBOCO])
+
+# Função para juntar dois conjuntos de esboços (soma das contagens de cada balde)
+def combinar(esboco, outro):
+    if outro.empty:
+        return esboco
+    if esboco.empty:
+        return outro
+    return _reagrupar(pd.concat([esboco, outro], ignore_index=True))
+
+# Esboços gravados por usuário (ver derivados.py): somados a cada ingestão e reconstruídos só quando defasados
+ESBOCOS = derivados.TabelaDerivada(
+    nome='esboco',
+    colunas=[esquema.COLUNA_ANALISTA, esquema.COLUNA_SITUACAO, esquema.COLUNA_TEMPO, esquema.COLUNA_DATA],
+    vazia=esboco_vazio,
+    calcular=lambda df: (calcular_esboco(df),),
+    iniciar=lambda usuario: (esboco_vazio(),),
+    acumular=lambda delta, df: (combinar(delta[0], calcular_esboco(df)),),
+    juntar=lambda atuais, delta: (combinar(atuais[0], delta[0]),),
+)
+
+# Percentis de cada linha de uma matriz (grupo x balde) de contagens; NaN para grupos sem tarefas
+def _percentis(contagens, quantis):
+    acumulado = np.cumsum(contagens, axis=1)
+    total = acumulado[:, -1:] if acumulado.shape[1] else np.zeros((len(contagens), 1))
+    resultado = np.full((len(contagens), len(quantis)), np.nan)
+    for j, quantil in enumerate(quantis):
+        # Posto (a partir de zero) do percentil entre as tarefas do grupo
+        posto = quantil * (total - 1)
+        balde = np.argmax(acumulado > posto, axis=1)
+        resultado[:, j] = np.where(total[:, 0] > 0, valores(balde), np.nan)
+    return resultado
+
+# Função para calcular os percentis do TMO (em segundos) de um recorte dos esboços
+def percentis(esboco, quantis=PERCENTIS):
+    balde = esboco['Balde'].to_numpy(dtype=np.int64)
+    contagens = np.bincount(balde, weights=esboco['Quantidade'].to_numpy(dtype=np.float64), minlength=1)
+    return dict(zip(quantis, _percentis(contagens[None, :], quantis)[0]))
+
+# Função para calcular os percentis do TMO (em segundos) de cada analista de um recorte dos esboços
+def percentis_por_analista(esboco, quantis=PERCENTIS):
+    analista = esboco[esquema.COLUNA_ANALISTA]
+    if isinstance(analista.dtype, pd.CategoricalDtype):
+        codigos, analistas = analista.cat.codes.to_numpy(), analista.cat.categories
+    else:
+        codigos, analistas = pd.factorize(analista, sort=True)
+    # Códigos de categóricas vêm em int8/int16: em int64 o índice combinado (analista x balde) não transborda
+    codigos = codigos.astype(np.int64)
+    validos = codigos >= 0
+    balde = esboco['Balde'].to_numpy(dtype=np.int64)[validos]
+    quantidade = esboco['Quantidade'].to_numpy(dtype=np.float64)[validos]
+    n_baldes = int(balde.max()) + 1 if len(balde) else 1
+    # Uma única contagem monta a matriz (analista x balde) de todos os analistas de uma vez
+    contagens = np.bincount(codigos[validos] * n_baldes + balde, weights=quantidade,
+                            minlength=len(analistas) * n_baldes).reshape(len(analistas), n_baldes)
+    tabela = pd.DataFrame({esquema.COLUNA_ANALISTA: np.asarray(analistas), 'Quantidade': contagens.sum(axis=1).astype(np.int64)})
+    for quantil, valor in zip(quantis, _percentis(contagens, quantis).T):
+        tabela[f'p{quantil * 100:g}'] = valor
+    return tabela[tabela['Quantidade'] > 0].reset_index(drop=True)
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+
+# Colunas do conjunto de dados de tarefas
+COLUNA_PROTOCOLO = 'NÚMERO DO PROTOCOLO'
+COLUNA_ANALISTA = 'USUÁRIO QUE CONCLUIU A TAREFA'
+COLUNA_SITUACAO = 'SITUAÇÃO DA TAREFA'
+COLUNA_TEMPO = 'TEMPO MÉDIO OPERACIONAL'
+COLUNA_DATA = 'DATA DE INÍCIO DA TAREFA'
+COLUNA_TAREFA = 'TAREFA'
+
+COLUNAS_PADRAO = [COLUNA_PROTOCOLO, COLUNA_ANALISTA, COLUNA_SITUACAO, COLUNA_TEMPO, COLUNA_DATA]
+
+# Colunas de baixa cardinalidade guardadas como categóricas
+COLUNAS_CATEGORICAS = [COLUNA_ANALISTA, COLUNA_SITUACAO, COLUNA_TAREFA]
+
+FORMATO_DATA = '%d/%m/%Y %H:%M:%S'
+
+# Tipo do TMO normalizado: segundos inteiros, com nulos para tempos ausentes ou inválidos
+TIPO_TEMPO = 'Int32'
+
+# Converte valores não nulos para texto, preservando os nulos (sem custo se a coluna já for só texto)
+def _texto(coluna):
+    if pd.api.types.infer_dtype(coluna, skipna=True) in ('string', 'empty'):
+        return coluna
+    return coluna.where(coluna.isna(), coluna.astype(str))
+
+# Função para converter o TMO (texto, timedelta ou segundos) em segundos inteiros
+def tempo_em_segundos(coluna):
+    if pd.api.types.is_timedelta64_dtype(coluna):
+        segundos = coluna.dt.total_seconds()
+    elif pd.api.types.is_numeric_dtype(coluna):
+        segundos = coluna.astype('float64')
+    else:
+        # Horas vindas do Excel como datetime.time viram texto "HH:MM:SS", que o pandas entende
+        segundos = pd.to_timedelta(_texto(coluna), errors='coerce').dt.total_seconds()
+    return segundos.round().astype(TIPO_TEMPO)
+
+# Função para converter a data de início no formato do sistema de tarefas (com alternativa para outros formatos)
+def data_inicio(coluna):
+    if pd.api.types.is_datetime64_dtype(coluna):
+        return coluna
+    datas = pd.to_datetime(coluna, format=FORMATO_DATA, errors='coerce')
+    pendentes = datas.isna() & coluna.notna()
+    if pendentes.any():
+        datas[pendentes] = pd.to_datetime(coluna[pendentes], dayfirst=True, errors='coerce')
+    return datas
+
+# Função para converter o protocolo em texto ("123" e não "123.0" quando o Excel lê a coluna como float)
+def protocolo(coluna):
+    if pd.api.types.is_float_dtype(coluna):
+        inteiros = coluna.dropna()
+        if (inteiros == np.floor(inteiros)).all():
+            coluna = coluna.astype('Int64')
+    if not pd.api.types.is_object_dtype(coluna):
+        coluna = coluna.astype(object)
+    return _texto(coluna)
+
+# Função para garantir que as colunas de baixa cardinalidade sejam categóricas
+def categorizar(df):
+    for coluna in COLUNAS_CATEGORICAS:
+        if coluna in df.columns and not isinstance(df[coluna].dtype, pd.CategoricalDtype):
+            df[coluna] = _texto(df[coluna]).astype('category')
+    return df
+
+# Função para normalizar os tipos de um lote de tarefas uma única vez, na ingestão (idempotente).
+# Com copiar=False o próprio DataFrame é alterado (para conjuntos recém-lidos, sem outro dono)
+def normalizar(df, copiar=True):
+    if copiar:
+        df = df.copy()
+    if COLUNA_PROTOCOLO in df.columns:
+        df[COLUNA_PROTOCOLO] = protocolo(df[COLUNA_PROTOCOLO])
+    if COLUNA_TEMPO in df.columns:
+        df[COLUNA_TEMPO] = tempo_em_segundos(df[COLUNA_TEMPO])
+    if COLUNA_DATA in df.columns:
+        df[COLUNA_DATA] = data_inicio(df[COLUNA_DATA])
+    df = categorizar(df)
+    # Demais colunas de texto vindas do Excel podem misturar números e strings, o que o Arrow não aceita
+    for coluna in df.columns[df.dtypes == object]:
+        df[coluna] = _texto(df[coluna])
+    return df
+
+# Indica se as colunas conhecidas já têm os tipos normalizados (olha só os tipos, sem percorrer os valores)
+def normalizado(df):
+    tipos = df.dtypes
+    if COLUNA_PROTOCOLO in df.columns and not pd.api.types.is_object_dtype(tipos[COLUNA_PROTOCOLO]):
+        return False
+    if COLUNA_TEMPO in df.columns and tipos[COLUNA_TEMPO] != TIPO_TEMPO:
+        return False
+    if COLUNA_DATA in df.columns and not pd.api.types.is_datetime64_dtype(tipos[COLUNA_DATA]):
+        return False
+    return all(isinstance(tipos[c], pd.CategoricalDtype) for c in COLUNAS_CATEGORICAS if c in df.columns)
+
+# Função para receber conjuntos que em geral já vêm normalizados da ingestão: só normaliza (com cópia) os que não vêm
+def garantir_normalizado(df):
+    return df if normalizado(df) else normalizar(df)
+
+# Função para juntar partes já normalizadas, mantendo as colunas categóricas
+def concatenar(partes):
+    if len(partes) == 1:
+        return partes[0]
+    return categorizar(pd.concat(partes, ignore_index=True))
+
+# Função para criar um conjunto vazio já com os tipos normalizados
+def vazio(colunas=None):
+    df = pd.DataFrame({
+        COLUNA_PROTOCOLO: pd.Series(dtype=object),
+        COLUNA_ANALISTA: pd.Series(dtype='category'),
+        COLUNA_SITUACAO: pd.Series(dtype='category'),
+        COLUNA_TEMPO: pd.Series(dtype=TIPO_TEMPO),
+        COLUNA_DATA: pd.Series(dtype='datetime64[ns]'),
+    })
+    if colunas is not None:
+        df = df[[c for c in colunas if c in df.columns]]
+    return df
+
+# Função para gerar a versão em texto do TMO, usada apenas na exportação
+def tempo_para_texto(coluna):
+    return pd.to_timedelta(coluna.astype('float64'), unit='s').astype(str)
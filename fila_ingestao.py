@@ -0,0 +1,112 @@
+import os
+import sys
+import uuid
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import armazenamento
+import ingestao
+
+# Quantidade de ingestões processadas ao mesmo tempo (ingestões de um mesmo usuário são sempre sequenciais)
+TRABALHADORES = int(os.environ.get('MAESTRO_INGESTAO_TRABALHADORES', '2'))
+
+# Quantos trabalhos concluídos de cada usuário ficam guardados para exibição na sidebar
+HISTORICO_POR_USUARIO = 5
+
+# Acima desta quantidade de segmentos publicados, os deltas do usuário são consolidados em segundo plano
+SEGMENTOS_COMPACTACAO = int(os.environ.get('MAESTRO_COMPACTAR_SEGMENTOS', '16'))
+
+NA_FILA, PROCESSANDO, CONCLUIDO, ERRO = 'na fila', 'processando', 'concluído', 'erro'
+
+_executor = ThreadPoolExecutor(max_workers=TRABALHADORES, thread_name_prefix='ingestao')
+_compactador = ThreadPoolExecutor(max_workers=1, thread_name_prefix='compactacao')
+_trava = threading.Lock()
+_trabalhos = {}  # id -> estado do trabalho
+# Envios já recebidos (usuário, identificadores dos arquivos no widget) -> id do trabalho: reexecuções do script
+# com o mesmo envio não recalculam as impressões digitais nem reenviam o trabalho, mesmo que ele tenha falhado
+_envios = {}
+_falhas = {}  # (usuário, impressões digitais) -> (envio, id do trabalho) das ingestões que terminaram em erro
+
+def _atualizar(id_trabalho, **campos):
+    with _trava:
+        _trabalhos[id_trabalho].update(campos)
+
+# Descarta os trabalhos concluídos mais antigos de um usuário
+def _limpar(usuario):
+    encerrados = [t for t in _trabalhos.values() if t['usuario'] == usuario and t['status'] in (CONCLUIDO, ERRO)]
+    for trabalho in sorted(encerrados, key=lambda t: t['inicio'])[:-HISTORICO_POR_USUARIO]:
+        del _trabalhos[trabalho['id']]
+
+# Agenda a consolidação dos deltas do usuário se houver segmentos demais. Falhas aqui não afetam o
+# trabalho já concluído: a consolidação é só uma otimização e será tentada de novo na próxima ingestão
+def _agendar_compactacao(usuario):
+    try:
+        if armazenamento.segmentos(usuario) >= SEGMENTOS_COMPACTACAO:
+            _compactador.submit(ingestao.compactar, usuario)
+    except Exception as erro:
+        print(f'Falha ao agendar a consolidação dos dados de {usuario}: {erro}', file=sys.stderr)
+
+def _executar(id_trabalho, usuario, arquivos):
+    _atualizar(id_trabalho, status=PROCESSANDO)
+    try:
+        resultado = ingestao.ingerir_varios(
+            usuario, arquivos,
+            progresso=lambda lidas, total: _atualizar(id_trabalho, lidas=lidas, total=total)
+        )
+        _atualizar(id_trabalho, status=CONCLUIDO, resultado=resultado, fim=datetime.now())
+        with _trava:
+            _falhas.pop((usuario, _trabalhos[id_trabalho]['digital']), None)
+    except Exception as erro:
+        _atualizar(id_trabalho, status=ERRO, erro=str(erro), fim=datetime.now())
+        with _trava:
+            trabalho = _trabalhos[id_trabalho]
+            _falhas[(usuario, trabalho['digital'])] = (trabalho['envio'], id_trabalho)
+    else:
+        _agendar_compactacao(usuario)
+    with _trava:
+        _limpar(usuario)
+
+# Função para enfileirar a ingestão de uma ou mais planilhas [(nome, conteúdo), ...] e devolver o id do trabalho.
+# 'envio' identifica o envio no widget (file_id de cada arquivo): reexecuções do script com o mesmo envio
+# reaproveitam o trabalho. Os mesmos arquivos enviados de novo também reaproveitam o trabalho, exceto se ele
+# terminou em erro: um novo envio dos arquivos que falharam é uma nova tentativa
+def enviar(usuario, arquivos, envio=None):
+    with _trava:
+        if envio is not None and (usuario, envio) in _envios:
+            return _envios[(usuario, envio)]
+    digital = tuple(sorted(ingestao.impressao_digital(conteudo) for _, conteudo in arquivos))
+    with _trava:
+        for trabalho in _trabalhos.values():
+            if trabalho['usuario'] == usuario and trabalho['digital'] == digital and trabalho['status'] != ERRO:
+                return trabalho['id']
+        envio_com_erro, id_com_erro = _falhas.get((usuario, digital), (None, None))
+        if id_com_erro is not None and (envio is None or envio == envio_com_erro):
+            return id_com_erro
+        id_trabalho = uuid.uuid4().hex[:12]
+        if envio is not None:
+            _envios[(usuario, envio)] = id_trabalho
+        _trabalhos[id_trabalho] = {
+            'id': id_trabalho, 'usuario': usuario, 'arquivo': ', '.join(nome for nome, _ in arquivos), 'digital': digital, 'envio': envio,
+            # Uma planilha avança por linhas lidas; um lote de planilhas, por planilhas lidas
+            'unidade': 'linhas' if len(arquivos) == 1 else 'planilhas',
+            'status': NA_FILA, 'lidas': 0, 'total': 0, 'resultado': None, 'erro': None,
+            'inicio': datetime.now(), 'fim': None,
+        }
+    _executor.submit(_executar, id_trabalho, usuario, list(arquivos))
+    return id_trabalho
+
+# Função para consultar o estado de um trabalho (None se o id não existir mais)
+def estado(id_trabalho):
+    with _trava:
+        trabalho = _trabalhos.get(id_trabalho)
+        return dict(trabalho) if trabalho is not None else None
+
+# Função para listar os trabalhos de um usuário, do mais recente para o mais antigo
+def trabalhos(usuario):
+    with _trava:
+        lista = [dict(t) for t in _trabalhos.values() if t['usuario'] == usuario]
+    return sorted(lista, key=lambda t: t['inicio'], reverse=True)
+
+# Indica se o usuário tem ingestões ainda não concluídas
+def em_andamento(usuario):
+    return any(t['status'] in (NA_FILA, PROCESSANDO) for t in trabalhos(usuario))
@@ -0,0 +1,175 @@
+import os
+import numpy as np
+import plotly.express as px
+
+# Construção das figuras da dashboard (sem dependência do Streamlit, para poderem ser guardadas em cache)
+CORES = ['#ff571c', '#7f2b0e', '#4c1908']
+
+# Acima desta quantidade de pontos os gráficos de linha entram no modo de período longo:
+# séries em WebGL e reduzidas com LTTB para no máximo este número de pontos
+LIMITE_PONTOS = int(os.environ.get('MAESTRO_GRAFICO_PONTOS', '730'))
+
+LEGENDA_HORIZONTAL = dict(orientation="h", yanchor="top", y=-0.1, xanchor="center", x=0.5)
+
+# Função vetorizada para formatar durações (em segundos) no formato "X min Ys"; 'nulo' é o texto dos valores ausentes
+def formatar_duracoes(segundos, nulo='0 min'):
+    segundos = np.asarray(segundos, dtype=np.float64)
+    nulos = np.isnan(segundos)
+    minutos, resto = np.divmod(np.where(nulos, 0, segundos).astype(np.int64), 60)
+    rotulos = np.char.add(np.char.add(minutos.astype(str), ' min '), np.char.add(resto.astype(str), 's'))
+    return np.where(nulos, nulo, rotulos)
+
+# Largest-Triangle-Three-Buckets: escolhe 'n' pontos que preservam o formato visual da série.
+# Devolve as posições escolhidas (sempre inclui o primeiro e o último ponto)
+def lttb(x, y, n):
+    tamanho = len(y)
+    if n >= tamanho or n < 3:
+        return np.arange(tamanho)
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = x.astype('datetime64[ns]').astype(np.int64)
+    x = x.astype(np.float64)
+    y = np.nan_to_num(np.asarray(y, dtype=np.float64))
+    limites = np.linspace(1, tamanho - 1, n - 1).astype(np.int64)
+    escolhidos = np.empty(n, dtype=np.int64)
+    escolhidos[0], escolhidos[-1] = 0, tamanho - 1
+    anterior = 0
+    for i in range(n - 2):
+        inicio, fim = limites[i], max(limites[i + 1], limites[i] + 1)
+        # Média do próximo balde (ou o último ponto, no último balde)
+        proximo_inicio, proximo_fim = fim, limites[i + 2] if i + 2 < len(limites) else tamanho
+        media_x = x[proximo_inicio:max(proximo_fim, proximo_inicio + 1)].mean()
+        media_y = y[proximo_inicio:max(proximo_fim, proximo_inicio + 1)].mean()
+        areas = np.abs(
+            (x[anterior] - media_x) * (y[inicio:fim] - y[anterior])
+            - (x[anterior] - x[inicio:fim]) * (media_y - y[anterior])
+        )
+        anterior = inicio + int(np.argmax(areas))
+        escolhidos[i + 1] = anterior
+    return escolhidos
+
+# Reduz uma série diária longa; devolve o conjunto a desenhar e se o modo de período longo está ativo
+def _reduzir(df, x, y):
+    if len(df) <= LIMITE_PONTOS:
+        return df, False
+    return df.iloc[lttb(df[x].to_numpy(), df[y].to_numpy(), LIMITE_PONTOS)], True
+
+def _titulo(titulo, desenhados, total):
+    return titulo if desenhados == total else f'{titulo} - {desenhados} de {total} dias'
+
+# Gráfico de linhas de produtividade diária
+def produtividade_diaria(df_produtividade):
+    df, longo = _reduzir(df_produtividade, 'Dia', 'Produtividade')
+    fig = px.line(
+        df,
+        x='Dia',
+        y='Produtividade',
+        title=_titulo('Produtividade Diária', len(df), len(df_produtividade)),
+        color_discrete_sequence=CORES,
+        labels={'Produtividade': 'Total de Cadastros'},
+        line_shape='linear',
+        markers=True,
+        render_mode='webgl' if longo else 'auto'
+    )
+    fig.update_traces(
+        hovertemplate='Dia = %{x|%d/%m/%Y}<br>Produtividade = %{y}'
+    )
+    return fig
+
+# Gráfico de linhas do TMO por dia da equipe (em minutos, com rótulos "X min Ys")
+def tmo_por_dia(df_tmo):
+    df, longo = _reduzir(df_tmo, 'Dia', 'TMO_minutos')
+    fig = px.line(
+        df,
+        x='Dia',
+        y='TMO_minutos',  # TMO em minutos
+        title=_titulo('TMO por Dia da Equipe (em minutos)', len(df), len(df_tmo)),
+        labels={'TMO_minutos': 'Tempo Médio Operacional (min)', 'Dia': 'Data'},
+        line_shape='linear',
+        markers=True,
+        color_discrete_sequence=CORES,
+        render_mode='webgl' if longo else 'auto'
+    )
+    fig.update_traces(
+        hovertemplate='Data = %{x|%d/%m/%Y}<br>TMO = %{text}',
+        text=formatar_duracoes(df['TMO_segundos'])
+    )
+    return fig
+
+# Gráfico de pizza para o status das tarefas da equipe
+def status(total_finalizados, total_reclass):
+    fig = px.pie(
+        names=['Finalizada', 'Cancelado'],
+        values=[total_finalizados, total_reclass],
+        title='Distribuição de Status',
+        color_discrete_sequence=CORES
+    )
+    fig.update_traces(
+        hovertemplate='Tarefas %{label} = %{value}<extra></extra>',
+    )
+    return fig
+
+# Gráfico de barras de TMO por analista em minutos
+def tmo_por_analista(df_tmo_analista):
+    rotulos_tmo = formatar_duracoes(df_tmo_analista['TMO_segundos'])
+    fig = px.bar(
+        df_tmo_analista,
+        x='USUÁRIO QUE CONCLUIU A TAREFA',
+        y='TMO_minutos',  # TMO em minutos
+        title='TMO por Analista (em minutos e segundos)',
+        labels={'TMO_minutos': 'TMO (min)', 'USUÁRIO QUE CONCLUIU A TAREFA': 'Analista'},
+        text=rotulos_tmo,
+        color_discrete_sequence=CORES
+    )
+    fig.update_traces(
+        textposition='outside',  # Exibe o tempo formatado fora das barras
+        hovertemplate='Analista = %{x}<br>TMO = %{text}<extra></extra>',
+        text=rotulos_tmo
+    )
+    return fig
+
+# Gráfico de pizza para o status do analista selecionado
+def status_analista(total_finalizados, total_reclass, analista):
+    fig = px.pie(
+        names=['Finalizado', 'Reclassificado'],
+        values=[total_finalizados, total_reclass],
+        title=f'Distribuição de Status - {analista}',
+        color_discrete_sequence=CORES
+    )
+    fig.update_traces(
+        hovertemplate='Tarefas %{label} = %{value}<extra></extra>',
+    )
+    fig.update_layout(legend=LEGENDA_HORIZONTAL)
+    return fig
+
+# Gráfico de pizza para as tarefas feitas pelo analista
+def tarefas_analista(por_tarefa, analista):
+    tarefas_feitas_analista = por_tarefa.rename(columns={'TAREFA': 'Tarefa'})
+    fig = px.pie(
+        names=tarefas_feitas_analista['Tarefa'],
+        values=tarefas_feitas_analista['Quantidade'],
+        title=f'Tarefas Feitas - {analista}',
+        color_discrete_sequence=CORES
+    )
+    fig.update_traces(
+        hovertemplate='Tarefas %{label} = %{value}<extra></extra>',
+    )
+    fig.update_layout(legend=LEGENDA_HORIZONTAL)
+    return fig
+
+# Gráfico de barras para o tempo médio do analista por dia
+def tmo_por_dia_analista(df_tmo_analista, analista):
+    rotulos_tmo = formatar_duracoes(df_tmo_analista['TMO_segundos'])
+    fig = px.bar(
+        df_tmo_analista, x='Dia',
+        y='TMO_minutos',
+        title=f'Tempo Médio por Dia - {analista}',
+        labels={'TMO_minutos': 'TMO (min)', 'Dia': 'Dia'},
+        text=rotulos_tmo,  # Exibe o tempo formatado fora das barras
+        color_discrete_sequence=CORES
+    )
+    fig.update_traces(
+        hovertemplate='Data = %{x|%d/%m/%Y}<br>TMO = %{text}',
+        text=rotulos_tmo  # Exibe o tempo formatado fora das barras
+    )
+    return fig
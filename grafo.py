@@ -0,0 +1,113 @@
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+import pandas as pd
+import cache_dados
+
+# Grafo de cálculos memoizados dos painéis. Cada nó tem um nome, os parâmetros que usa diretamente
+# (fonte, versão dos dados, período, analista) e os nós de que depende; a chave de um nó reúne os seus
+# parâmetros e os de todas as dependências, de modo que uma reexecução só recalcula os nós cujas
+# entradas mudaram (trocar o analista não refaz os cálculos da equipe). Os resultados são
+# compartilhados entre as sessões do processo e não devem ser alterados por quem os recebe.
+# Os nós de origem (tabelas inteiras de um usuário) não são memoizados aqui: já ficam no cache_dados,
+# sob o limite de MAESTRO_CACHE_MB; os demais respeitam um limite de entradas e outro de memória
+LIMITE_ENTRADAS = int(os.environ.get('MAESTRO_GRAFO_ENTRADAS', '512'))
+LIMITE_MEMORIA = int(os.environ.get('MAESTRO_GRAFO_MB', '256')) * 1024 * 1024
+
+# Parâmetros que identificam o conjunto de dados e a sua versão
+FONTE, VERSAO = 'fonte', 'versao'
+
+@dataclass
+class No:
+    funcao: object
+    parametros: tuple  # parâmetros usados diretamente pela função
+    dependencias: tuple  # nós cujos valores a função recebe
+    entradas: tuple  # todos os parâmetros que determinam o resultado (os próprios e os das dependências)
+    memoizar: bool  # False para nós cujo valor já vem de outro cache
+
+_nos = {}
+_valores = OrderedDict()  # (nó, ((parâmetro, valor), ...)) -> (resultado, bytes)
+_memoria = 0
+_estatisticas = {}  # nó -> {'acertos': n, 'faltas': n}
+_trava = threading.Lock()
+
+# Decorador para registrar uma função como nó do grafo; ela recebe os valores das dependências e
+# dos parâmetros como argumentos nomeados. As dependências precisam ter sido registradas antes
+def no(nome, parametros=(), dependencias=(), memoizar=True):
+    def registrar(funcao):
+        desconhecidas = [d for d in dependencias if d not in _nos]
+        if desconhecidas:
+            raise ValueError(f"Dependências desconhecidas do nó '{nome}': {', '.join(desconhecidas)}")
+        entradas = set(parametros)
+        for dependencia in dependencias:
+            entradas.update(_nos[dependencia].entradas)
+        _nos[nome] = No(funcao, tuple(parametros), tuple(dependencias), tuple(sorted(entradas)), memoizar)
+        return funcao
+    return registrar
+
+# Memória ocupada por um resultado: tabelas e índices, soltos ou dentro de tuplas e dataclasses
+def _tamanho(valor):
+    if isinstance(valor, (tuple, list)):
+        return sum(_tamanho(v) for v in valor)
+    if hasattr(valor, '__dataclass_fields__'):
+        return sum(_tamanho(v) for v in vars(valor).values())
+    return cache_dados._tamanho(valor)
+
+def _remover(chave):
+    global _memoria
+    _memoria -= _valores.pop(chave)[1]
+
+# Descarta os resultados do mesmo nó e da mesma fonte calculados sobre outra versão dos dados
+def _descartar_versoes_antigas(chave):
+    nome, entradas = chave[0], dict(chave[1])
+    if VERSAO not in entradas:
+        return
+    for antiga in [c for c in _valores if c[0] == nome]:
+        anteriores = dict(antiga[1])
+        if anteriores.get(FONTE) == entradas.get(FONTE) and anteriores[VERSAO] != entradas[VERSAO]:
+            _remover(antiga)
+
+# Função para obter o valor de um nó no contexto (parâmetro -> valor), calculando-o, e às dependências
+# necessárias, apenas quando alguma das suas entradas mudou
+def calcular(nome, contexto):
+    global _memoria
+    no = _nos[nome]
+    chave = (nome, tuple((parametro, contexto[parametro]) for parametro in no.entradas))
+    if no.memoizar:
+        with _trava:
+            contador = _estatisticas.setdefault(nome, {'acertos': 0, 'faltas': 0})
+            if chave in _valores:
+                _valores.move_to_end(chave)
+                contador['acertos'] += 1
+                return _valores[chave][0]
+            contador['faltas'] += 1
+
+    argumentos = {dependencia: calcular(dependencia, contexto) for dependencia in no.dependencias}
+    argumentos.update({parametro: contexto[parametro] for parametro in no.parametros})
+    valor = no.funcao(**argumentos)
+    # Um resultado ausente não é memoizado: ele pode passar a existir sem que as entradas mudem
+    # (ex.: o relatório do período gerado em lote depois da primeira consulta)
+    if not no.memoizar or valor is None:
+        return valor
+    tamanho = _tamanho(valor)
+    with _trava:
+        _descartar_versoes_antigas(chave)
+        if chave in _valores:
+            _remover(chave)
+        _valores[chave] = (valor, tamanho)
+        _memoria += tamanho
+        while _valores and (len(_valores) > LIMITE_ENTRADAS or _memoria > LIMITE_MEMORIA):
+            _remover(next(iter(_valores)))
+    return valor
+
+# Acertos, faltas e memória ocupada de cada nó memoizado, para ajustar o grafo e os limites
+def estatisticas():
+    with _trava:
+        memoria = {}
+        for (nome, _), (_, tamanho) in _valores.items():
+            memoria[nome] = memoria.get(nome, 0) + tamanho
+        linhas = [dict(no=nome, memoria=memoria.get(nome, 0), **contador) for nome, contador in _estatisticas.items()]
+    df = pd.DataFrame(linhas, columns=['no', 'acertos', 'faltas', 'memoria'])
+    df['taxa_acerto'] = df['acertos'] / (df['acertos'] + df['faltas']).where(lambda total: total > 0)
+    return df.sort_values('no').reset_index(drop=True)
@@ -0,0 +1,63 @@
+from dataclasses import dataclass
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+
+# Índice de um conjunto ordenado pela data: recortes por período com busca binária
+# e posições das linhas de cada analista, calculados uma vez por versão dos dados
+@dataclass
+class IndiceTemporal:
+    tempos: np.ndarray  # datas (datetime64[ns]) já ordenadas; nulos ficam no fim
+    n_validos: int  # quantidade de linhas com data preenchida
+    posicoes_analista: dict  # analista -> posições (crescentes) das suas linhas
+
+    # Primeira e última data do conjunto (None se não houver datas)
+    def limites(self):
+        if self.n_validos == 0:
+            return None, None
+        return pd.Timestamp(self.tempos[0]).date(), pd.Timestamp(self.tempos[self.n_validos - 1]).date()
+
+    # Intervalo [inicio, fim) de posições entre duas datas, inclusive nas duas pontas
+    def intervalo(self, data_inicial, data_final):
+        validos = self.tempos[:self.n_validos]
+        inicio = np.searchsorted(validos, np.datetime64(pd.Timestamp(data_inicial)), side='left')
+        fim = np.searchsorted(validos, np.datetime64(pd.Timestamp(data_final) + timedelta(days=1)), side='left')
+        return int(inicio), int(max(inicio, fim))
+
+    # Posições das linhas de um analista dentro do período
+    def posicoes(self, data_inicial, data_final, analista):
+        inicio, fim = self.intervalo(data_inicial, data_final)
+        posicoes = self.posicoes_analista.get(analista, np.empty(0, dtype=np.int64))
+        return posicoes[np.searchsorted(posicoes, inicio):np.searchsorted(posicoes, fim)]
+
+# Função para ordenar um conjunto pela coluna de data (sem custo se já estiver ordenado)
+def ordenar(df, coluna_data):
+    if df[coluna_data].is_monotonic_increasing or df.empty:
+        return df
+    return df.sort_values(coluna_data, kind='stable', na_position='last').reset_index(drop=True)
+
+# Função para construir o índice de um conjunto já ordenado pela data
+def construir(df, coluna_data, coluna_analista):
+    tempos = df[coluna_data].to_numpy(dtype='datetime64[ns]')
+    n_validos = int(len(tempos) - np.isnat(tempos).sum())
+
+    if isinstance(df[coluna_analista].dtype, pd.CategoricalDtype):
+        codigos, analistas = df[coluna_analista].cat.codes.to_numpy(), df[coluna_analista].cat.categories
+    else:
+        codigos, analistas = pd.factorize(df[coluna_analista])
+    # Uma única ordenação estável agrupa as posições por analista mantendo a ordem temporal
+    ordem = np.argsort(codigos, kind='stable')
+    contagens = np.bincount(codigos[codigos >= 0], minlength=len(analistas))
+    limites = np.concatenate([[0], np.cumsum(contagens)]) + int((codigos < 0).sum())
+    posicoes_analista = {
+        analista: ordem[limites[i]:limites[i + 1]]
+        for i, analista in enumerate(analistas) if contagens[i] > 0
+    }
+    return IndiceTemporal(tempos=tempos, n_validos=n_validos, posicoes_analista=posicoes_analista)
+
+# Função para recortar o conjunto pelo período e, opcionalmente, por analista, sem varrer o histórico
+def fatiar(df, indice, data_inicial, data_final, analista=None):
+    if analista is None:
+        inicio, fim = indice.intervalo(data_inicial, data_final)
+        return df.iloc[inicio:fim]
+    return df.iloc[indice.posicoes(data_inicial, data_final, analista)]
@@ -0,0 +1,158 @@
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import datetime, timedelta
+import pandas as pd
+
+# Registro de indisponibilidades do sistema em SQLite: os registros brutos, os intervalos já unidos
+# (sem sobreposição, indexados pelo início) e os totais por dia e por semana, mantidos a cada registro
+FORMATO_BANCO = '%Y-%m-%d %H:%M:%S'
+FORMATO_DIA = '%Y-%m-%d'
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS registros (
+    id INTEGER PRIMARY KEY,
+    inicio TEXT NOT NULL,
+    fim TEXT NOT NULL,
+    registrado TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS intervalos (inicio TEXT PRIMARY KEY, fim TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS intervalos_fim ON intervalos (fim);
+CREATE TABLE IF NOT EXISTS totais_diarios (dia TEXT PRIMARY KEY, segundos INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS totais_semanais (semana TEXT PRIMARY KEY, segundos INTEGER NOT NULL);
+"""
+
+_trava = threading.Lock()
+_preparados = set()
+
+def caminho_banco(usuario):
+    return f'indisponibilidade_{usuario}.db'
+
+def _conectar(usuario):
+    novo = not os.path.exists(caminho_banco(usuario))
+    conexao = sqlite3.connect(caminho_banco(usuario), timeout=30)
+    with _trava:
+        if novo or usuario not in _preparados:
+            conexao.executescript(_ESQUEMA)
+            _preparados.add(usuario)
+    return conexao
+
+def _texto(data):
+    return data.strftime(FORMATO_BANCO)
+
+def _data(texto):
+    return datetime.strptime(texto, FORMATO_BANCO)
+
+# Divide um intervalo em segundos por dia (intervalos podem atravessar a meia-noite)
+def _por_dia(inicio, fim):
+    partes = {}
+    atual = inicio
+    while atual < fim:
+        meia_noite = datetime.combine(atual.date() + timedelta(days=1), datetime.min.time())
+        fim_parte = min(fim, meia_noite)
+        partes[atual.date()] = partes.get(atual.date(), 0) + int((fim_parte - atual).total_seconds())
+        atual = fim_parte
+    return partes
+
+# Soma (sinal=1) ou retira (sinal=-1) um intervalo dos totais diários e semanais
+def _somar(conexao, inicio, fim, sinal):
+    for dia, segundos in _por_dia(inicio, fim).items():
+        semana = dia - timedelta(days=dia.weekday())  # semana identificada pela segunda-feira
+        conexao.execute(
+            'INSERT INTO totais_diarios (dia, segundos) VALUES (?, ?) '
+            'ON CONFLICT(dia) DO UPDATE SET segundos = segundos + excluded.segundos',
+            (dia.strftime(FORMATO_DIA), sinal * segundos))
+        conexao.execute(
+            'INSERT INTO totais_semanais (semana, segundos) VALUES (?, ?) '
+            'ON CONFLICT(semana) DO UPDATE SET segundos = segundos + excluded.segundos',
+            (semana.strftime(FORMATO_DIA), sinal * segundos))
+
+# Função para registrar uma indisponibilidade; janelas sobrepostas ou encostadas são unidas,
+# de modo que um mesmo período nunca é contado duas vezes nos totais
+def registrar(usuario, inicio, fim):
+    inicio, fim = inicio.replace(microsecond=0), fim.replace(microsecond=0)
+    if fim <= inicio:
+        raise ValueError("O fim da indisponibilidade deve ser posterior ao início.")
+    with closing(_conectar(usuario)) as conexao, conexao:
+        conexao.execute('INSERT INTO registros (inicio, fim, registrado) VALUES (?, ?, ?)',
+                        (_texto(inicio), _texto(fim), _texto(datetime.now())))
+        sobrepostos = conexao.execute(
+            'SELECT inicio, fim FROM intervalos WHERE inicio <= ? AND fim >= ?', (_texto(fim), _texto(inicio))
+        ).fetchall()
+        for inicio_antigo, fim_antigo in sobrepostos:
+            _somar(conexao, _data(inicio_antigo), _data(fim_antigo), -1)
+            conexao.execute('DELETE FROM intervalos WHERE inicio = ?', (inicio_antigo,))
+            inicio, fim = min(inicio, _data(inicio_antigo)), max(fim, _data(fim_antigo))
+        conexao.execute('INSERT INTO intervalos (inicio, fim) VALUES (?, ?)', (_texto(inicio), _texto(fim)))
+        _somar(conexao, inicio, fim, 1)
+    return inicio, fim
+
+# Cláusula WHERE dos totais (sempre sem os dias zerados por uniões de intervalos)
+def _periodo(coluna, data_inicial, data_final):
+    condicoes, parametros = ['segundos > 0'], []
+    if data_inicial is not None:
+        condicoes.append(f'{coluna} >= ?')
+        parametros.append(data_inicial.strftime(FORMATO_DIA))
+    if data_final is not None:
+        condicoes.append(f'{coluna} <= ?')
+        parametros.append(data_final.strftime(FORMATO_DIA))
+    return ' WHERE ' + ' AND '.join(condicoes), parametros
+
+def _consultar(usuario, sql, parametros, colunas):
+    if not os.path.exists(caminho_banco(usuario)):
+        return pd.DataFrame({c: [] for c in colunas})
+    with closing(_conectar(usuario)) as conexao:
+        return pd.DataFrame(conexao.execute(sql, parametros).fetchall(), columns=colunas)
+
+# Função para listar os intervalos unidos que tocam o período
+def intervalos(usuario, data_inicial=None, data_final=None):
+    condicoes, parametros = [], []
+    if data_final is not None:
+        condicoes.append('inicio < ?')
+        parametros.append((data_final + timedelta(days=1)).strftime(FORMATO_DIA))
+    if data_inicial is not None:
+        condicoes.append('fim > ?')
+        parametros.append(data_inicial.strftime(FORMATO_DIA))
+    where = (' WHERE ' + ' AND '.join(condicoes)) if condicoes else ''
+    df = _consultar(usuario, f'SELECT inicio, fim FROM intervalos{where} ORDER BY inicio', parametros, ['Início', 'Fim'])
+    df['Início'] = pd.to_datetime(df['Início'], format=FORMATO_BANCO)
+    df['Fim'] = pd.to_datetime(df['Fim'], format=FORMATO_BANCO)
+    df['Duração'] = (df['Fim'] - df['Início']).dt.total_seconds()
+    return df
+
+# Função para obter os totais diários (em segundos) já calculados, com 'Dia' no mesmo formato do rollup
+def totais_diarios(usuario, data_inicial=None, data_final=None):
+    where, parametros = _periodo('dia', data_inicial, data_final)
+    df = _consultar(usuario, f'SELECT dia, segundos FROM totais_diarios{where} ORDER BY dia', parametros, ['Dia', 'Indisponibilidade'])
+    df['Dia'] = pd.to_datetime(df['Dia'], format=FORMATO_DIA)
+    return df
+
+# Função para somar, por dia, os totais de vários usuários (visão consolidada da equipe)
+def totais_diarios_equipe(usuarios, data_inicial=None, data_final=None):
+    partes = [df for df in (totais_diarios(usuario, data_inicial, data_final) for usuario in usuarios) if not df.empty]
+    if not partes:
+        return pd.DataFrame({'Dia': pd.Series(dtype='datetime64[ns]'), 'Indisponibilidade': pd.Series(dtype='int64')})
+    return pd.concat(partes, ignore_index=True).groupby('Dia', as_index=False)['Indisponibilidade'].sum()
+
+# Função para obter os totais semanais (em segundos), com a semana identificada pela segunda-feira
+def totais_semanais(usuario, data_inicial=None, data_final=None):
+    where, parametros = _periodo('semana', data_inicial, data_final)
+    df = _consultar(usuario, f'SELECT semana, segundos FROM totais_semanais{where} ORDER BY semana', parametros, ['Semana', 'Indisponibilidade'])
+    df['Semana'] = pd.to_datetime(df['Semana'], format=FORMATO_DIA)
+    return df
+
+# Função para obter o total de indisponibilidade (em segundos) no período
+def total(usuario, data_inicial=None, data_final=None):
+    return int(totais_diarios(usuario, data_inicial, data_final)['Indisponibilidade'].sum())
+
+# Função para formatar segundos como "HH:MM:SS" (as horas podem passar de 24)
+def formatar(segundos):
+    horas, resto = divmod(int(segundos), 3600)
+    return f"{horas:02d}:{resto // 60:02d}:{resto % 60:02d}"
+
+# Função para juntar, por dia, a produtividade (calcular_produtividade_diaria) e a indisponibilidade
+def juntar_produtividade(df_produtividade, df_totais):
+    df = df_produtividade.merge(df_totais[['Dia', 'Indisponibilidade']], on='Dia', how='left')
+    df['Indisponibilidade'] = df['Indisponibilidade'].fillna(0)
+    return df
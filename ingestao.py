@@ -0,0 +1,192 @@
+import os
+import json
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import armazenamento
+import cache_dados
+import agregados
+import esbocos
+import atencao
+import esquema
+
+COLUNA_PROTOCOLO = esquema.COLUNA_PROTOCOLO
+
+# Tabelas derivadas mantidas a cada ingestão (ver derivados.py)
+DERIVADAS = [agregados.ROLLUP, esbocos.ESBOCOS, atencao.PONTOS]
+
+# Número máximo de processos usados para ler várias planilhas de uma vez
+PROCESSOS = int(os.environ.get('MAESTRO_INGESTAO_PROCESSOS', str(os.cpu_count() or 1)))
+
+# Ingestões e compactações de um mesmo usuário são feitas uma de cada vez, também entre processos: a trava
+# vai da leitura dos protocolos existentes à publicação, às tabelas derivadas e ao registro de planilhas
+def _trava_usuario(usuario):
+    return armazenamento.travar(usuario, armazenamento.INGESTAO)
+
+# Arquivo com as impressões digitais das planilhas já ingeridas pelo usuário
+def caminho_registro(usuario):
+    return f'ingestoes_{usuario}.json'
+
+# Função para calcular a impressão digital (hash do conteúdo) de uma planilha enviada
+def impressao_digital(conteudo):
+    return hashlib.sha256(conteudo).hexdigest()
+
+def carregar_registro(usuario):
+    caminho = caminho_registro(usuario)
+    if os.path.exists(caminho):
+        with open(caminho, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    return {}
+
+def _salvar_registro(usuario, registro):
+    caminho = caminho_registro(usuario)
+    with open(caminho + '.tmp', 'w', encoding='utf-8') as file:
+        json.dump(registro, file, ensure_ascii=False, indent=2)
+    os.replace(caminho + '.tmp', caminho)
+
+# Função para manter apenas as linhas cujo protocolo ainda não existe no histórico nem se repete no lote
+def filtrar_novas(df_novo, protocolos_existentes):
+    if COLUNA_PROTOCOLO not in df_novo.columns:
+        return df_novo
+    protocolos = df_novo[COLUNA_PROTOCOLO]
+    # Linhas sem protocolo não podem ser deduplicadas e são mantidas
+    sem_protocolo = df_novo[COLUNA_PROTOCOLO].isna()
+    repetidas = protocolos.duplicated() & ~sem_protocolo
+    ja_existentes = protocolos.isin(protocolos_existentes) & ~sem_protocolo
+    return df_novo[~(repetidas | ja_existentes)]
+
+# Função para ler só a coluna de protocolos do histórico (projeção colunar)
+def protocolos_existentes(usuario):
+    df = armazenamento.carregar(usuario, [COLUNA_PROTOCOLO])
+    if COLUNA_PROTOCOLO not in df.columns:
+        return set()
+    return set(df[COLUNA_PROTOCOLO].dropna())
+
+# Função para ingerir uma planilha enviada: ignora arquivos repetidos e anexa apenas as linhas novas.
+# A planilha é lida em lotes; cada lote é normalizado e gravado direto no armazenamento, de modo que
+# a memória usada não cresce com o tamanho do arquivo. progresso(lidas, total) é chamado a cada lote
+def ingerir(usuario, nome_arquivo, conteudo, progresso=None):
+    with _trava_usuario(usuario):
+        return _ingerir(usuario, nome_arquivo, conteudo, progresso)
+
+def _ingerir(usuario, nome_arquivo, conteudo, progresso):
+    digital = impressao_digital(conteudo)
+    registro = carregar_registro(usuario)
+    if digital in registro:
+        return {'status': 'ignorado', 'arquivo': registro[digital]['arquivo'], 'novas': 0, 'duplicadas': 0}
+
+    existentes = protocolos_existentes(usuario)
+    versao_anterior = armazenamento.versao(usuario)
+    deltas = [tabela.iniciar(usuario) for tabela in DERIVADAS]
+    linhas = novas = 0
+    # Os lotes só ficam visíveis para os leitores quando a planilha inteira tiver sido gravada
+    pendente = armazenamento.iniciar_lotes(usuario)
+    try:
+        for lote, lidas, total in armazenamento.ler_excel_em_lotes(BytesIO(conteudo)):
+            # Os tipos são normalizados uma única vez, aqui; daí em diante os dados já circulam tipados
+            lote = esquema.normalizar(lote)
+            df_delta = filtrar_novas(lote, existentes)
+            if COLUNA_PROTOCOLO in df_delta.columns:
+                # Protocolos deste lote contam como existentes para os lotes seguintes da mesma planilha
+                existentes.update(df_delta[COLUNA_PROTOCOLO].dropna())
+            armazenamento.anexar(df_delta, usuario, pendente=pendente)
+            deltas = [tabela.acumular(delta, df_delta) for tabela, delta in zip(DERIVADAS, deltas)]
+            linhas += len(lote)
+            novas += len(df_delta)
+            if progresso is not None:
+                progresso(lidas, total)
+    except Exception:
+        armazenamento.descartar_lotes(pendente)
+        raise
+    armazenamento.publicar_lotes(usuario, pendente)
+    # Versão lida uma única vez após a publicação: as tabelas derivadas são gravadas com ela
+    versao_nova = armazenamento.versao(usuario)
+    for tabela, delta in zip(DERIVADAS, deltas):
+        tabela.somar(usuario, delta, versao_anterior, versao_nova)
+    cache_dados.invalidar(usuario)
+
+    _registrar(registro, digital, nome_arquivo, linhas, novas)
+    _salvar_registro(usuario, registro)
+    return {'status': 'ingerido', 'arquivo': nome_arquivo, 'novas': novas, 'duplicadas': linhas - novas}
+
+# Função para ler e normalizar uma planilha inteira (executada nos processos auxiliares)
+def _ler_planilha(conteudo):
+    partes = [esquema.normalizar(lote) for lote, _, _ in armazenamento.ler_excel_em_lotes(BytesIO(conteudo))]
+    return esquema.concatenar(partes) if partes else pd.DataFrame()
+
+# Função para ingerir várias planilhas de uma vez: a leitura é feita em paralelo (um processo por núcleo),
+# as planilhas são unidas em ordem de nome, deduplicadas pelo protocolo e gravadas numa única escrita.
+# progresso(concluidas, total) é chamado a cada planilha lida
+def ingerir_varios(usuario, arquivos, progresso=None):
+    if len(arquivos) == 1:
+        return ingerir(usuario, arquivos[0][0], arquivos[0][1], progresso)
+    with _trava_usuario(usuario):
+        return _ingerir_varios(usuario, arquivos, progresso)
+
+def _ingerir_varios(usuario, arquivos, progresso):
+    registro = carregar_registro(usuario)
+    pendentes = {}
+    ignorados = []
+    for nome_arquivo, conteudo in arquivos:
+        digital = impressao_digital(conteudo)
+        if digital in registro or digital in pendentes:
+            ignorados.append(nome_arquivo)
+        else:
+            pendentes[digital] = (nome_arquivo, conteudo)
+    nomes = ', '.join(nome for nome, _ in arquivos)
+    if not pendentes:
+        return {'status': 'ignorado', 'arquivo': nomes, 'novas': 0, 'duplicadas': 0, 'ignorados': ignorados}
+
+    # Ordem determinística de união (nome do arquivo e conteúdo), independente da ordem de envio
+    ordem = sorted(pendentes, key=lambda d: (pendentes[d][0], d))
+    # 'spawn' evita duplicar as threads do servidor no processo filho
+    with ProcessPoolExecutor(max_workers=max(1, min(PROCESSOS, len(ordem))), mp_context=multiprocessing.get_context('spawn')) as executor:
+        futuros = [executor.submit(_ler_planilha, pendentes[digital][1]) for digital in ordem]
+        planilhas = []
+        for concluidas, futuro in enumerate(futuros, start=1):
+            planilhas.append(futuro.result())
+            if progresso is not None:
+                progresso(concluidas, len(futuros))
+
+    origem = np.repeat(np.arange(len(planilhas)), [len(df) for df in planilhas])
+    df_novo = esquema.concatenar([df for df in planilhas if not df.empty] or [pd.DataFrame()])
+    df_novo = df_novo.reset_index(drop=True)
+    df_delta = filtrar_novas(df_novo, protocolos_existentes(usuario))
+    novas_por_planilha = np.bincount(origem[df_delta.index.to_numpy()], minlength=len(planilhas))
+    df_delta = df_delta.reset_index(drop=True)
+
+    versao_anterior = armazenamento.versao(usuario)
+    armazenamento.anexar(df_delta, usuario)
+    versao_nova = armazenamento.versao(usuario)
+    for tabela in DERIVADAS:
+        tabela.atualizar(usuario, df_delta, versao_anterior, versao_nova)
+    cache_dados.invalidar(usuario)
+
+    for i, digital in enumerate(ordem):
+        _registrar(registro, digital, pendentes[digital][0], len(planilhas[i]), int(novas_por_planilha[i]))
+    _salvar_registro(usuario, registro)
+    return {'status': 'ingerido', 'arquivo': nomes, 'novas': len(df_delta), 'duplicadas': len(df_novo) - len(df_delta), 'ignorados': ignorados}
+
+# Função para consolidar os deltas do usuário no arquivo principal (ver armazenamento.compactar).
+# Roda entre as ingestões do usuário, e o rollup continua valendo, pois o conteúdo dos dados não muda
+def compactar(usuario):
+    with _trava_usuario(usuario):
+        versoes = armazenamento.compactar(usuario)
+        if versoes is None:
+            return False
+        for tabela in DERIVADAS:
+            tabela.renovar(usuario, *versoes)
+        cache_dados.invalidar(usuario)
+        return True
+
+def _registrar(registro, digital, nome_arquivo, linhas, novas):
+    registro[digital] = {
+        'arquivo': nome_arquivo,
+        'linhas': linhas,
+        'novas': novas,
+        'data': datetime.now().strftime('%d/%m/%Y %H:%M:%S'),
+    }
@@ -0,0 +1,105 @@
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+
+# Códigos das situações usadas nos indicadores; as demais situações caem no código OUTRAS
+FINALIZADA, CANCELADA, OUTRAS = 0, 1, 2
+N_SITUACOES = 3
+
+# Resultado único consumido por todos os painéis (tempos sempre em segundos)
+@dataclass
+class Metricas:
+    total_finalizadas: int
+    total_canceladas: int
+    tempo_medio: float  # TMO das tarefas finalizadas e canceladas (0 se não houver)
+    tmo_finalizadas: float  # TMO apenas das finalizadas (NaN se não houver)
+    por_dia: pd.DataFrame
+    por_analista: pd.DataFrame
+    por_tarefa: pd.DataFrame
+
+    @property
+    def total_geral(self):
+        return self.total_finalizadas + self.total_canceladas
+
+# Códigos inteiros de uma coluna (aproveita os códigos de colunas categóricas); nulos recebem -1.
+# Os códigos de categóricas vêm em int8/int16 conforme o número de categorias: são convertidos para int64
+# para que os índices combinados (código x situação) não transbordem
+def _codigos(coluna):
+    if isinstance(coluna.dtype, pd.CategoricalDtype):
+        return coluna.cat.codes.to_numpy().astype(np.int64), coluna.cat.categories
+    codigos, categorias = pd.factorize(coluna, sort=True)
+    return codigos, categorias
+
+def _codigos_situacao(coluna):
+    codigos, categorias = _codigos(coluna)
+    mapa = np.full(len(categorias) + 1, OUTRAS, dtype=np.int64)  # posição extra para nulos (-1)
+    for situacao, codigo in (('Finalizada', FINALIZADA), ('Cancelada', CANCELADA)):
+        if situacao in categorias:
+            mapa[categorias.get_loc(situacao)] = codigo
+    return mapa[codigos]
+
+# Tabela cruzada (grupo x situação) de quantidade e tempo, feita com np.bincount sobre os códigos
+def _cruzar(codigos, situacao, quantidade, tempo, n_grupos):
+    validos = codigos >= 0
+    indice = codigos[validos] * N_SITUACOES + situacao[validos]
+    tamanho = n_grupos * N_SITUACOES
+    contagem = np.bincount(indice, weights=quantidade[validos], minlength=tamanho).reshape(n_grupos, N_SITUACOES)
+    soma_tempo = np.bincount(indice, weights=tempo[validos], minlength=tamanho).reshape(n_grupos, N_SITUACOES)
+    return contagem, soma_tempo
+
+def _media(tempo, quantidade):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(quantidade > 0, tempo / np.where(quantidade > 0, quantidade, 1), np.nan)
+
+# Função para calcular todos os indicadores de uma vez a partir do rollup diário
+def calcular(rollup):
+    situacao = _codigos_situacao(rollup['SITUAÇÃO DA TAREFA'])
+    quantidade = rollup['Quantidade'].to_numpy(dtype=np.float64)
+    tempo = rollup['Tempo_Total'].to_numpy(dtype=np.float64)
+
+    codigos_dia, dias = _codigos(rollup['Dia'])
+    codigos_analista, analistas = _codigos(rollup['USUÁRIO QUE CONCLUIU A TAREFA'])
+    codigos_tarefa, tarefas = _codigos(rollup['TAREFA'])
+
+    contagem_dia, tempo_dia = _cruzar(codigos_dia, situacao, quantidade, tempo, len(dias))
+    contagem_analista, tempo_analista = _cruzar(codigos_analista, situacao, quantidade, tempo, len(analistas))
+    contagem_tarefa = np.bincount(codigos_tarefa[codigos_tarefa >= 0], weights=quantidade[codigos_tarefa >= 0], minlength=len(tarefas))
+    contagem_total = np.bincount(situacao, weights=quantidade, minlength=N_SITUACOES)
+    tempo_total = np.bincount(situacao, weights=tempo, minlength=N_SITUACOES)
+
+    finalizadas_canceladas = contagem_dia[:, FINALIZADA] + contagem_dia[:, CANCELADA]
+    por_dia = pd.DataFrame({
+        'Dia': np.asarray(dias),
+        'Finalizado': contagem_dia[:, FINALIZADA].astype(np.int64),
+        'Cancelada': contagem_dia[:, CANCELADA].astype(np.int64),
+        'Produtividade': finalizadas_canceladas.astype(np.int64),
+        'Tempo_Total': tempo_dia[:, FINALIZADA] + tempo_dia[:, CANCELADA],
+    })
+    por_dia['TMO'] = _media(por_dia['Tempo_Total'].to_numpy(), finalizadas_canceladas)
+    por_dia = por_dia[contagem_dia.sum(axis=1) > 0].reset_index(drop=True)
+
+    finalizadas_canceladas = contagem_analista[:, FINALIZADA] + contagem_analista[:, CANCELADA]
+    por_analista = pd.DataFrame({
+        'USUÁRIO QUE CONCLUIU A TAREFA': np.asarray(analistas),
+        'Finalizado': contagem_analista[:, FINALIZADA].astype(np.int64),
+        'Cancelado': contagem_analista[:, CANCELADA].astype(np.int64),
+        'Total': finalizadas_canceladas.astype(np.int64),
+        'Tempo_Total': tempo_analista[:, FINALIZADA] + tempo_analista[:, CANCELADA],
+    })
+    por_analista['TMO'] = _media(por_analista['Tempo_Total'].to_numpy(), finalizadas_canceladas)
+    # Categorias sem nenhuma linha no recorte (ex.: analistas fora do período) não entram nos painéis
+    por_analista = por_analista[contagem_analista.sum(axis=1) > 0].reset_index(drop=True)
+
+    por_tarefa = pd.DataFrame({'TAREFA': np.asarray(tarefas), 'Quantidade': contagem_tarefa.astype(np.int64)})
+    por_tarefa = por_tarefa[por_tarefa['Quantidade'] > 0].sort_values(by='Quantidade', ascending=False, kind='stable').reset_index(drop=True)
+
+    total_fc = contagem_total[FINALIZADA] + contagem_total[CANCELADA]
+    return Metricas(
+        total_finalizadas=int(contagem_total[FINALIZADA]),
+        total_canceladas=int(contagem_total[CANCELADA]),
+        tempo_medio=float((tempo_total[FINALIZADA] + tempo_total[CANCELADA]) / total_fc) if total_fc > 0 else 0.0,
+        tmo_finalizadas=float(_media(tempo_total[FINALIZADA], contagem_total[FINALIZADA])),
+        por_dia=por_dia,
+        por_analista=por_analista,
+        por_tarefa=por_tarefa,
+    )
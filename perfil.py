@@ -0,0 +1,144 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+import pandas as pd
+import streamlit as st
+import grafo
+
+# Medição opcional do tempo de cada seção da dashboard. Fica ativa para todos com MAESTRO_PERFIL=1,
+# ou por sessão, pelo painel de desempenho (visível apenas para os usuários em MAESTRO_ADMINS)
+ATIVO_PADRAO = os.environ.get('MAESTRO_PERFIL', '0') == '1'
+ADMINISTRADORES = {u.strip() for u in os.environ.get('MAESTRO_ADMINS', '').split(',') if u.strip()}
+CAMINHO_LOG = os.environ.get('MAESTRO_PERFIL_LOG', 'perfil.jsonl')
+
+# Quantidade de registros mais recentes do log usados no cálculo dos percentis
+JANELA_PERCENTIS = 20000
+
+_TAMANHO_PAGINA = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+# Cada sessão do Streamlit executa o script na sua própria thread: o contexto da medição é por thread
+_contexto = threading.local()
+_trava_log = threading.Lock()
+
+# Memória residente do processo, em bytes (0 onde /proc não existe)
+def _memoria():
+    try:
+        with open('/proc/self/statm', 'r') as file:
+            return int(file.read().split()[1]) * _TAMANHO_PAGINA
+    except (OSError, ValueError, IndexError):
+        return 0
+
+def ativo():
+    return getattr(_contexto, 'ativo', False)
+
+# Função para iniciar a medição de uma execução do script (chamada no começo da dashboard)
+def iniciar(usuario):
+    _contexto.usuario = usuario
+    _contexto.ativo = st.session_state.get('perfil_ativo', ATIVO_PADRAO)
+    _contexto.registros = []
+
+def _gravar(registro):
+    _contexto.registros.append(registro)
+    with _trava_log:
+        with open(CAMINHO_LOG, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(registro, ensure_ascii=False) + '\n')
+
+# Quantidade de linhas de um resultado, quando fizer sentido (DataFrames, Series, listas)
+def _linhas(valor):
+    if isinstance(valor, (pd.DataFrame, pd.Series, list, tuple)):
+        return len(valor)
+    return None
+
+# Mede uma seção: tempo de relógio, memória do processo antes/depois e linhas processadas.
+# O dicionário devolvido aceita 'linhas' preenchido pelo chamador
+@contextmanager
+def secao(nome, linhas=None):
+    if not ativo():
+        yield {}
+        return
+    medida = {'linhas': linhas}
+    memoria_inicial = _memoria()
+    inicio = time.perf_counter()
+    try:
+        yield medida
+    finally:
+        _gravar({
+            'data': datetime.now().isoformat(timespec='seconds'),
+            'usuario': _contexto.usuario,
+            'secao': nome,
+            'segundos': round(time.perf_counter() - inicio, 6),
+            'linhas': medida.get('linhas'),
+            'memoria_delta': _memoria() - memoria_inicial,
+        })
+
+# Decorador para medir uma função inteira; as linhas vêm do primeiro argumento (o conjunto processado)
+def medido(nome):
+    def decorador(funcao):
+        @wraps(funcao)
+        def envolvida(*args, **kwargs):
+            if not ativo():
+                return funcao(*args, **kwargs)
+            with secao(nome, _linhas(args[0]) if args else None) as medida:
+                resultado = funcao(*args, **kwargs)
+                if medida['linhas'] is None:
+                    medida['linhas'] = _linhas(resultado)
+            return resultado
+        return envolvida
+    return decorador
+
+# Pontos desenhados numa figura (x das linhas/barras, values das pizzas)
+def _pontos(figura):
+    total = 0
+    for serie in figura.data:
+        valores = getattr(serie, 'x', None)
+        if valores is None:
+            valores = getattr(serie, 'values', None)
+        total += len(valores) if valores is not None else 0
+    return total
+
+# Função para desenhar um gráfico medindo a serialização do Plotly (linhas = pontos das séries)
+def plotly_chart(nome, figura, **kwargs):
+    if not ativo():
+        return st.plotly_chart(figura, **kwargs)
+    with secao(f'grafico: {nome}', _pontos(figura)):
+        return st.plotly_chart(figura, **kwargs)
+
+# Função para calcular p50/p95 por usuário e seção a partir dos registros mais recentes do log
+def percentis(caminho=None):
+    caminho = CAMINHO_LOG if caminho is None else caminho
+    if not caminho or not os.path.exists(caminho):
+        return pd.DataFrame(columns=['usuario', 'secao', 'execucoes', 'p50', 'p95', 'linhas', 'memoria_delta'])
+    with open(caminho, 'r', encoding='utf-8') as file:
+        registros = [json.loads(linha) for linha in deque(file, maxlen=JANELA_PERCENTIS) if linha.strip()]
+    if not registros:
+        return percentis('')
+    df = pd.DataFrame(registros)
+    df['linhas'] = pd.to_numeric(df['linhas'])
+    grupos = df.groupby(['usuario', 'secao'])
+    return pd.DataFrame({
+        'execucoes': grupos['segundos'].size(),
+        'p50': grupos['segundos'].quantile(0.5),
+        'p95': grupos['segundos'].quantile(0.95),
+        'linhas': grupos['linhas'].median(),
+        'memoria_delta': grupos['memoria_delta'].median(),
+    }).reset_index().sort_values(['usuario', 'p95'], ascending=[True, False]).reset_index(drop=True)
+
+# Painel de desempenho na sidebar, exibido apenas para administradores
+def painel(usuario):
+    if usuario not in ADMINISTRADORES:
+        return
+    with st.sidebar.expander("Desempenho (admin)"):
+        st.checkbox("Medir seções", value=st.session_state.get('perfil_ativo', ATIVO_PADRAO), key='perfil_ativo')
+        registros = getattr(_contexto, 'registros', [])
+        if registros:
+            st.caption("Última execução")
+            st.dataframe(pd.DataFrame(registros)[['secao', 'segundos', 'linhas', 'memoria_delta']])
+        st.caption("p50/p95 por seção (segundos)")
+        st.dataframe(percentis())
+        st.caption("Cálculos memoizados (acertos e faltas por nó)")
+        st.dataframe(grafo.estatisticas())
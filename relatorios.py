@@ -0,0 +1,259 @@
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+from dataclasses import dataclass
+from datetime import datetime, date
+from html import escape
+import pandas as pd
+import agregados
+import armazenamento
+import cache_dados
+import consolidado
+import indice
+import metricas
+
+# Motor de relatórios sem Streamlit: calcula de uma vez, para um período, todos os indicadores da
+# Visão Geral e das Métricas Individuais (de cada analista) e grava Parquet + HTML.
+# A dashboard reaproveita o relatório quando a versão dos dados e o período são os mesmos
+TABELAS = ['por_dia', 'por_analista', 'por_tarefa']
+COLUNA_ANALISTA = 'Analista'
+
+# Pasta do relatório do usuário
+def caminho_relatorio(usuario):
+    return f'relatorio_{usuario}'
+
+# Função para calcular o TMO por dia (da equipe ou de um analista) a partir dos indicadores.
+# O TMO fica em segundos; os rótulos em texto só são gerados, com formatar_duracoes, na hora de desenhar
+def tmo_por_dia(indicadores):
+    # Apenas dias com tarefas finalizadas ou canceladas, pois estas são relevantes para o cálculo do TMO
+    por_dia = indicadores.por_dia[indicadores.por_dia['Produtividade'] > 0]
+    return pd.DataFrame({
+        'Dia': por_dia['Dia'].to_numpy(),
+        'TMO_segundos': por_dia['TMO'].to_numpy(),
+        'TMO_minutos': por_dia['TMO'].to_numpy() / 60,
+    })
+
+def produtividade_diaria(indicadores):
+    # Finalizadas, canceladas e produtividade total já vêm da passada única do motor de métricas
+    return indicadores.por_dia[['Dia', 'Finalizado', 'Cancelada', 'Produtividade']]
+
+def tmo_por_analista(indicadores):
+    # Apenas analistas com tarefas finalizadas ou canceladas
+    por_analista = indicadores.por_analista[indicadores.por_analista['Total'] > 0]
+    return pd.DataFrame({
+        'USUÁRIO QUE CONCLUIU A TAREFA': por_analista['USUÁRIO QUE CONCLUIU A TAREFA'].to_numpy(),
+        'TMO_segundos': por_analista['TMO'].to_numpy(),
+        'TMO_minutos': por_analista['TMO'].to_numpy() / 60,
+    })
+
+# Ranking de analistas por total de tarefas finalizadas e canceladas (posição a partir de 1)
+def ranking(indicadores):
+    df_ranking = indicadores.por_analista[['USUÁRIO QUE CONCLUIU A TAREFA', 'Finalizado', 'Cancelado', 'Total']]
+    df_ranking = df_ranking.sort_values(by='Total', ascending=False).reset_index(drop=True)
+    df_ranking.index += 1
+    df_ranking.index.name = 'Posição'
+    return df_ranking.rename(columns={'USUÁRIO QUE CONCLUIU A TAREFA': 'Usuário'})
+
+# Resultado de um relatório: indicadores da equipe e de cada analista no período
+@dataclass
+class Relatorio:
+    usuario: str
+    versao: tuple  # versão dos dados usada no cálculo (armazenamento.versao)
+    data_inicial: date
+    data_final: date
+    equipe: metricas.Metricas
+    analistas: dict  # analista -> Metricas
+
+    # Indicadores de um analista (None se ele não tiver tarefas no período)
+    def analista(self, nome):
+        return self.analistas.get(nome)
+
+# Função para calcular o relatório do usuário: os dados são carregados uma única vez (rollup indexado)
+# e o período de cada analista é recortado pelo índice, sem varrer o histórico de novo
+def calcular(usuario, data_inicial=None, data_final=None):
+    versao = armazenamento.versao(usuario)
+    rollup, idx = cache_dados.obter_indexado(agregados.ROLLUP, usuario, versao)
+    minimo, maximo = idx.limites()
+    data_inicial = data_inicial or minimo or date.today()
+    data_final = data_final or maximo or date.today()
+    df_total = indice.fatiar(rollup, idx, data_inicial, data_final)
+    equipe = metricas.calcular(df_total)
+    analistas = {
+        analista: metricas.calcular(indice.fatiar(rollup, idx, data_inicial, data_final, analista))
+        for analista in equipe.por_analista['USUÁRIO QUE CONCLUIU A TAREFA']
+    }
+    return Relatorio(usuario, versao, data_inicial, data_final, equipe, analistas)
+
+def _resumo(indicadores):
+    return {
+        'total_finalizadas': indicadores.total_finalizadas,
+        'total_canceladas': indicadores.total_canceladas,
+        'tempo_medio': indicadores.tempo_medio,
+        'tmo_finalizadas': indicadores.tmo_finalizadas,
+    }
+
+# Tabelas longas com os indicadores de todos os analistas (coluna 'Analista')
+def _tabelas_analistas(relatorio):
+    tabelas = {}
+    for tabela in TABELAS + ['resumo']:
+        partes = []
+        for nome, indicadores in relatorio.analistas.items():
+            df = pd.DataFrame([_resumo(indicadores)]) if tabela == 'resumo' else getattr(indicadores, tabela)
+            partes.append(df.assign(**{COLUNA_ANALISTA: nome}))
+        tabelas[tabela] = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame({COLUNA_ANALISTA: []})
+    return tabelas
+
+# Função para gravar o relatório: Parquet (equipe_*.parquet e analistas_*.parquet), manifesto e HTML.
+# A pasta é montada com nome único ao lado do destino e trocada de uma vez, para a dashboard nunca ler
+# um relatório pela metade e duas gravações simultâneas não escreverem na mesma pasta temporária
+def gravar(relatorio, destino=None, html=True):
+    destino = destino or caminho_relatorio(relatorio.usuario)
+    pasta = os.path.dirname(os.path.abspath(destino))
+    nome = os.path.basename(destino)
+    temporario = tempfile.mkdtemp(prefix=f'.{nome}.', suffix='.tmp', dir=pasta)
+    try:
+        pd.DataFrame([_resumo(relatorio.equipe)]).to_parquet(os.path.join(temporario, 'equipe_resumo.parquet'), index=False)
+        for tabela in TABELAS:
+            getattr(relatorio.equipe, tabela).to_parquet(os.path.join(temporario, f'equipe_{tabela}.parquet'), index=False)
+        for tabela, df in _tabelas_analistas(relatorio).items():
+            df.to_parquet(os.path.join(temporario, f'analistas_{tabela}.parquet'), index=False)
+        with open(os.path.join(temporario, 'manifesto.json'), 'w', encoding='utf-8') as file:
+            json.dump({
+                'usuario': relatorio.usuario,
+                'versao': relatorio.versao,
+                'data_inicial': relatorio.data_inicial.isoformat(),
+                'data_final': relatorio.data_final.isoformat(),
+                'gerado_em': datetime.now().isoformat(timespec='seconds'),
+                'esquema': cache_dados.ESQUEMA,
+            }, file, ensure_ascii=False, indent=2)
+        if html:
+            with open(os.path.join(temporario, 'relatorio.html'), 'w', encoding='utf-8') as file:
+                file.write(gerar_html(relatorio))
+        # A pasta antiga vai para outro nome único (a troca sobre uma pasta vazia é permitida) e só então é apagada
+        antigo = tempfile.mkdtemp(prefix=f'.{nome}.', suffix='.antigo', dir=pasta)
+        try:
+            os.replace(destino, antigo)
+        except FileNotFoundError:
+            pass
+        os.replace(temporario, destino)
+        shutil.rmtree(antigo, ignore_errors=True)
+    finally:
+        shutil.rmtree(temporario, ignore_errors=True)
+    return destino
+
+def _metricas(resumo, por_dia, por_analista, por_tarefa):
+    return metricas.Metricas(
+        total_finalizadas=int(resumo['total_finalizadas']),
+        total_canceladas=int(resumo['total_canceladas']),
+        tempo_medio=float(resumo['tempo_medio']),
+        tmo_finalizadas=float(resumo['tmo_finalizadas']),
+        por_dia=por_dia.reset_index(drop=True),
+        por_analista=por_analista.reset_index(drop=True),
+        por_tarefa=por_tarefa.reset_index(drop=True),
+    )
+
+def _ler_manifesto(destino):
+    caminho = os.path.join(destino, 'manifesto.json')
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+# Função para carregar o relatório gravado, se ele corresponder à versão dos dados e ao período pedidos
+def carregar(usuario, versao, data_inicial, data_final, destino=None):
+    destino = destino or caminho_relatorio(usuario)
+    manifesto = _ler_manifesto(destino)
+    if (manifesto is None or manifesto['esquema'] != cache_dados.ESQUEMA
+            or manifesto['versao'] != json.loads(json.dumps(versao))
+            or manifesto['data_inicial'] != data_inicial.isoformat() or manifesto['data_final'] != data_final.isoformat()):
+        return None
+    try:
+        ler = lambda nome: pd.read_parquet(os.path.join(destino, f'{nome}.parquet'))
+        equipe = _metricas(ler('equipe_resumo').iloc[0], *(ler(f'equipe_{t}') for t in TABELAS))
+        tabelas = {t: ler(f'analistas_{t}') for t in TABELAS + ['resumo']}
+    except OSError:
+        # A pasta foi trocada por um relatório mais novo durante a leitura
+        return None
+    grupos = {t: dict(tuple(df.groupby(COLUNA_ANALISTA, sort=False))) for t, df in tabelas.items()}
+    analistas = {}
+    for _, linha in tabelas['resumo'].iterrows():
+        nome = linha[COLUNA_ANALISTA]
+        partes = [grupos[t].get(nome, getattr(equipe, t).iloc[:0]).drop(columns=COLUNA_ANALISTA, errors='ignore') for t in TABELAS]
+        analistas[nome] = _metricas(linha, *partes)
+    return Relatorio(usuario, versao, data_inicial, data_final, equipe, analistas)
+
+def _tabela_html(df, index=False):
+    return df.to_html(index=index, border=0, classes='tabela', na_rep='')
+
+# Os dados da figura vão num bloco <script>: um '</' vindo dos nomes (ex.: '</script>') encerraria o bloco,
+# então é trocado por '<\/', que o JavaScript lê igual
+def _figura_html(figura):
+    conteudo = figura.to_html(full_html=False, include_plotlyjs=False)
+    inicio = conteudo.index('>', conteudo.index('<script')) + 1
+    fim = conteudo.rindex('</script>')
+    return conteudo[:inicio] + conteudo[inicio:fim].replace('</', '<\\/') + conteudo[fim:]
+
+def _cartoes(indicadores):
+    import graficos
+    return (
+        f"<p><b>Total Geral:</b> {indicadores.total_geral} &nbsp; "
+        f"<b>Finalizadas:</b> {indicadores.total_finalizadas} &nbsp; "
+        f"<b>Canceladas:</b> {indicadores.total_canceladas} &nbsp; "
+        f"<b>Tempo Médio por Cadastro:</b> {graficos.formatar_duracoes([indicadores.tempo_medio])[0]}</p>"
+    )
+
+# Função para montar o relatório em HTML (mesmos painéis da dashboard, com Plotly carregado da CDN).
+# graficos (Plotly) é importado aqui para que a dashboard possa usar este módulo sem carregá-lo
+def gerar_html(relatorio):
+    import graficos
+    equipe = relatorio.equipe
+    # Nomes de usuário e de analista vêm das planilhas e são escapados antes de entrar no HTML
+    usuario = escape(str(relatorio.usuario))
+    periodo = f"{relatorio.data_inicial.strftime('%d/%m/%Y')} a {relatorio.data_final.strftime('%d/%m/%Y')}"
+    partes = [
+        '<html><head><meta charset="utf-8">',
+        f'<title>Relatório de Produtividade - {usuario}</title>',
+        '<script src="https://cdn.plot.ly/plotly-2.16.1.min.js"></script>',
+        '<style>body{font-family:sans-serif;margin:2em} .tabela{border-collapse:collapse} .tabela td,.tabela th{padding:4px 8px;border-bottom:1px solid #ddd}</style>',
+        '</head><body>',
+        f'<h1>Relatório de Produtividade - {usuario}</h1><p>Período: {periodo}</p>',
+        '<h2>Visão Geral</h2>', _cartoes(equipe),
+        _figura_html(graficos.produtividade_diaria(produtividade_diaria(equipe))),
+        _figura_html(graficos.tmo_por_dia(tmo_por_dia(equipe))),
+        _figura_html(graficos.status(equipe.total_finalizadas, equipe.total_canceladas)),
+        _figura_html(graficos.tmo_por_analista(tmo_por_analista(equipe))),
+        '<h3>Ranking</h3>', _tabela_html(ranking(equipe), index=True),
+        '<h2>Métricas Individuais</h2>',
+    ]
+    for nome, indicadores in relatorio.analistas.items():
+        partes += [f'<h3>{escape(str(nome))}</h3>', _cartoes(indicadores)]
+        if not indicadores.por_tarefa.empty:
+            partes += [_tabela_html(indicadores.por_tarefa.rename(columns={'TAREFA': 'Tarefa'})),
+                       _figura_html(graficos.tarefas_analista(indicadores.por_tarefa, nome))]
+        partes += [_figura_html(graficos.status_analista(indicadores.total_finalizadas, indicadores.total_canceladas, nome)),
+                   _figura_html(graficos.tmo_por_dia_analista(tmo_por_dia(indicadores), nome))]
+    partes.append('</body></html>')
+    return '\n'.join(partes)
+
+def _data(texto):
+    return datetime.strptime(texto, '%d/%m/%Y').date()
+
+def principal(argumentos=None):
+    parser = argparse.ArgumentParser(description='Gera os relatórios de produtividade (Parquet e HTML) sem abrir a dashboard.')
+    parser.add_argument('usuarios', nargs='*', help='usuários (padrão: todos com dados no diretório atual)')
+    parser.add_argument('--inicio', type=_data, help='data inicial (dd/mm/aaaa); padrão: primeira data dos dados')
+    parser.add_argument('--fim', type=_data, help='data final (dd/mm/aaaa); padrão: última data dos dados')
+    parser.add_argument('--sem-html', action='store_true', help='grava apenas os arquivos Parquet')
+    args = parser.parse_args(argumentos)
+
+    for usuario in args.usuarios or consolidado.usuarios():
+        relatorio = calcular(usuario, args.inicio, args.fim)
+        destino = gravar(relatorio, html=not args.sem_html)
+        print(f"{usuario}: {len(relatorio.analistas)} analistas, {relatorio.equipe.total_geral} tarefas -> {destino}", file=sys.stderr)
+
+# Uso (ex.: agendado à noite): python relatorios.py [usuário ...] [--inicio dd/mm/aaaa] [--fim dd/mm/aaaa]
+if __name__ == "__main__":
+    principal()